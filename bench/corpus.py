@@ -0,0 +1,92 @@
+"""synthetic benchmark corpus: ground truth files in the schema of `test/example_truth.json`, each with
+a gzipped raw data file of accelerometer records at a fixed rate and a location record per minute"""
+
+import argparse, datetime, gzip, json, os, random
+
+LABELS = ["WALKING", "RUNNING", "STANDING"]
+START = datetime.datetime(2012, 5, 16, 9, 0, 0)
+TZ = "-08:00"
+
+def isotime(t):
+    return t.isoformat() if t.tzinfo else t.isoformat() + TZ
+
+def random_items(t1, t2, per_hour, rng):
+    """return time ordered list of labeled items between datetimes `t1` and `t2`, `per_hour` of them.
+    each falls at a random offset of its own slot of the span, so the items never overlap"""
+    n = int(round(per_hour * (t2 - t1).total_seconds() / 3600.0))
+    if not n:
+        return []
+    slot = (t2 - t1).total_seconds() / n
+    items = []
+    for k in xrange(n):
+        a = t1 + datetime.timedelta(seconds=slot * (k + rng.uniform(0, .3)))
+        b = a + datetime.timedelta(seconds=slot * rng.uniform(.3, .7))
+        items.append(dict(label=rng.choice(LABELS), t1=isotime(a), t2=isotime(b)))
+    return items
+
+def random_labels(t1, t2, rng):
+    """return ground truth labels covering most of `t1` to `t2`, alternating labeled intervals and short gaps"""
+    labels = []
+    t = t1
+    while True:
+        t += datetime.timedelta(seconds=rng.uniform(0, 120)) #unlabeled gap
+        end = t + datetime.timedelta(seconds=rng.uniform(30, 900))
+        if end > t2:
+            return labels
+        labels.append(dict(label=rng.choice(LABELS), body_position="RIGHT_FRONT_POCKET", t1=isotime(t), t2=isotime(end)))
+        t = end
+
+def write_records(data_file, t1, hours, rate, rng):
+    """write `hours` of records sampled at `rate` Hz from datetime `t1` to gzipped `data_file`, return record count"""
+    n = int(hours * 3600 * rate)
+    f = gzip.open(data_file, "wb")
+    try:
+        f.write("[")
+        for i in xrange(n):
+            t = t1 + datetime.timedelta(seconds=i / float(rate))
+            if i:
+                f.write(", ")
+            f.write(json.dumps(dict(type="accel", time=isotime(t), x=rng.gauss(0, 1), y=rng.gauss(0, 1), z=rng.gauss(9.8, 1))))
+            if i % int(60 * rate) == 0:
+                f.write(", " + json.dumps(dict(type="location", time=isotime(t), lat=60.17 + rng.uniform(0, .01), lon=24.94 + rng.uniform(0, .01))))
+        f.write("]")
+    finally:
+        f.close()
+    return n
+
+def make_corpus(out, cases=4, hours=1.0, rate=10, seed=0):
+    """write `cases` ground truth files with their raw data to dir `out`, return list of the ground truth files"""
+    rng = random.Random(seed)
+    if not os.path.isdir(out):
+        os.makedirs(out)
+    truth_files = []
+    for k in xrange(cases):
+        t1 = START + datetime.timedelta(days=k)
+        t2 = t1 + datetime.timedelta(hours=hours)
+        data_dir = "case%03d" % k
+        if not os.path.isdir(os.path.join(out, data_dir)):
+            os.makedirs(os.path.join(out, data_dir))
+        write_records(os.path.join(out, data_dir, "data.json.gz"), t1, hours, rate, rng)
+        truth = dict(data_path=os.path.join(data_dir, "*.gz"),
+                     description="Synthetic benchmark case %d, %g hours at %g Hz" % (k, hours, rate),
+                     device="synthetic", hw="%015d" % k,
+                     labels=random_labels(t1, t2, rng))
+        truth_file = os.path.join(out, "truth%03d.json" % k)
+        with open(truth_file, "w") as f:
+            f.write(json.dumps(truth, indent=1))
+        truth_files.append(truth_file)
+    return truth_files
+
+def main():
+    parser = argparse.ArgumentParser(description="write a synthetic benchmark corpus")
+    parser.add_argument("out", metavar="OUT_DIR", type=str, help="dir to write the ground truth and raw data files")
+    parser.add_argument("--cases", metavar="N", type=int, default=4, help="number of ground truth files (default: %(default)s)")
+    parser.add_argument("--hours", metavar="H", type=float, default=1.0, help="hours of raw data per case (default: %(default)s)")
+    parser.add_argument("--rate", metavar="HZ", type=float, default=10, help="raw data sampling rate (default: %(default)s)")
+    parser.add_argument("--seed", metavar="N", type=int, default=0, help="random seed (default: %(default)s)")
+    args = parser.parse_args()
+    for truth_file in make_corpus(args.out, args.cases, args.hours, args.rate, args.seed):
+        print truth_file
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os, random, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from recog import AbstractRecognizer
+from bench.corpus import LABELS, random_items
+from iso8601.iso8601 import parse_date
+
+""" Dummy recognizers for benchmarks, returning random detections at a configurable density"""
+
+class DensityDetector(AbstractRecognizer):
+    """reads the time of every record, and returns `DENSITY` random detections per hour over the span of the records.
+    the density can also be set with the PERFBOARD_BENCH_DENSITY environment variable, or given to the constructor
+    along with the random `seed`, e.g. to sweep them"""
+    DENSITY = float(os.environ.get("PERFBOARD_BENCH_DENSITY", 60))
+    SEED = 0
+
+    def __init__(self, density=None, seed=None):
+        if density is not None:
+            self.DENSITY = density
+        if seed is not None:
+            self.SEED = seed
+        self.reset()
+
+    def labels_supported(self):
+        return LABELS
+
+    def process(self, recs):
+        for rec in recs:
+            t = rec["time"]
+            if self.t1 is None:
+                self.t1 = t
+            self.t2 = t
+
+    def get_results(self, time_range=None):
+        if self.t1 is None:
+            return []
+        rng = random.Random(self.SEED)
+        return random_items(parse_date(self.t1), parse_date(self.t2), self.DENSITY, rng)
+
+    def reset(self):
+        self.t1 = self.t2 = None
+
+class SparseDetector(DensityDetector):
+    """a few long detections"""
+    DENSITY = 6
+
+class DenseDetector(DensityDetector):
+    """many short detections, as from an unsmoothed frame classifier"""
+    DENSITY = 600
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""timing benchmarks of scoring, ingestion and end-to-end runs over a synthetic corpus.
+results are written to a json file, and can be compared against the results of a baseline run."""
+
+import argparse, copy, datetime, glob, os, platform, random, shutil, subprocess, sys, tempfile, time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import ingest
+import pack
+import score
+
+from bench.corpus import make_corpus, random_items
+from util import read_json, write_json
+from iso8601.iso8601 import parse_date
+
+E2E_RECOGNIZERS = "bench.recognizers.SparseDetector,bench.recognizers.DensityDetector,bench.recognizers.DenseDetector"
+
+def timed(fn, repeat, setup=None):
+    """call `fn(setup())` `repeat` times, return dict of the best and mean wall seconds and the last return value"""
+    times = []
+    for i in xrange(repeat):
+        arg = setup() if setup else None
+        t0 = time.time()
+        ret = fn(arg)
+        times.append(time.time() - t0)
+    return dict(best=min(times), mean=sum(times) / len(times), runs=len(times)), ret
+
+def data_files(truth_files):
+    """return list of the raw data files of `truth_files`"""
+    files = []
+    for truth_file in truth_files:
+        head, tail = os.path.split(truth_file)
+        files.extend(x for x in glob.glob(os.path.join(head, read_json(truth_file)["data_path"])) if not os.path.isdir(x))
+    return files
+
+def bench_scoring(truth_files, density, repeat, seed):
+    """time `score.score_results` and `score.score_aggregate` on the labels of `truth_files` and random detections"""
+    rng = random.Random(seed)
+    cases = []
+    for truth_file in truth_files:
+        d = read_json(truth_file)
+        d["t1"], d["t2"] = d["labels"][0]["t1"], d["labels"][-1]["t2"] #span of the case, as of its raw data
+        d["detected"] = random_items(parse_date(d["t1"]), parse_date(d["t2"]), density, rng)
+        cases.append(d)
+    items = sum(len(d["labels"]) + len(d["detected"]) for d in cases)
+
+    def score_all(cases):
+        for d in cases:
+            d["scores"] = score.score_results(d)
+        return cases
+
+    res = {}
+    res["score_results"], scored = timed(score_all, repeat, lambda: copy.deepcopy(cases))
+    res["score_results"]["count"] = items
+    res["score_aggregate"], _ = timed(lambda x: score.score_aggregate(scored), repeat)
+    res["score_aggregate"]["count"] = sum(len(d["scores"]["segments"]) for d in scored)
+    return res
+
+def bench_ingest(files, repeat):
+    """time decoding the raw data `files` whole, incrementally, and from the packed format"""
+    def read_all(x):
+        return sum(len(ingest.read_records(f)) for f in files)
+
+    def iter_all(x):
+        return sum(1 for f in files for rec in ingest.iter_records(f))
+
+    def pack_all(x):
+        return sum(pack.pack_file(f) for f in files)
+
+    def packed_times(x):
+        return sum(len(recs.times()) for f in files for recs in pack.read_packed(f))
+
+    res = {}
+    for name, fn in (("ingest.read_records", read_all), ("ingest.iter_records", iter_all),
+                     ("pack.pack_file", pack_all), ("pack.read_packed", packed_times)):
+        res[name], count = timed(fn, repeat)
+        res[name]["count"] = count
+    for f in files:
+        shutil.rmtree(pack.pack_path(f), ignore_errors=True)
+    return res
+
+def bench_e2e(truth_files, repeat, work):
+    """time `perfboard.py` runs of the dummy recognizers over `truth_files`"""
+    outpath = os.path.join(work, "out")
+    cmd = [sys.executable, os.path.join(ROOT, "perfboard.py"), "--no-cache", "--norotate", "--outpath", outpath,
+           "--recognizers=" + E2E_RECOGNIZERS] + truth_files
+
+    def run(x):
+        with open(os.devnull, "w") as devnull:
+            subprocess.check_call(cmd, cwd=ROOT, stdout=devnull, stderr=devnull)
+        return len(truth_files) * len(E2E_RECOGNIZERS.split(","))
+
+    res = {}
+    res["perfboard"], count = timed(run, repeat)
+    res["perfboard"]["count"] = count
+    return res
+
+def compare(results, baseline, tolerance):
+    """print the change of each benchmark from `baseline`, return list of names slower by more than `tolerance`"""
+    slower = []
+    print "%-24s %10s %10s %8s" % ("benchmark", "baseline", "best", "change")
+    for name in sorted(results["benchmarks"]):
+        new = results["benchmarks"][name]["best"]
+        old = baseline["benchmarks"].get(name, {}).get("best")
+        if not old:
+            print "%-24s %10s %10.4f %8s" % (name, "-", new, "-")
+            continue
+        change = new / old - 1
+        flag = ""
+        if change > tolerance:
+            slower.append(name)
+            flag = " SLOWER"
+        print "%-24s %10.4f %10.4f %+7.1f%%%s" % (name, old, new, change * 100, flag)
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark perfboard scoring and ingestion on a synthetic corpus")
+    parser.add_argument("--out", metavar="RESULTS_FILE", type=str, default="bench_results.json", help="file to write the results (default: %(default)s)")
+    parser.add_argument("--baseline", metavar="RESULTS_FILE", type=str, help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", metavar="FRACTION", type=float, default=0.2, help="slowdown from the baseline reported as a regression (default: %(default)s)")
+    parser.add_argument("--cases", metavar="N", type=int, default=4, help="number of ground truth files (default: %(default)s)")
+    parser.add_argument("--hours", metavar="H", type=float, default=1.0, help="hours of raw data per case (default: %(default)s)")
+    parser.add_argument("--rate", metavar="HZ", type=float, default=10, help="raw data sampling rate (default: %(default)s)")
+    parser.add_argument("--density", metavar="N", type=float, default=600, help="detections per hour for the scoring benchmarks (default: %(default)s)")
+    parser.add_argument("--repeat", metavar="N", type=int, default=3, help="runs of each benchmark, the best is reported (default: %(default)s)")
+    parser.add_argument("--seed", metavar="N", type=int, default=0, help="random seed (default: %(default)s)")
+    parser.add_argument("--corpus", metavar="DIR", type=str, help="dir of an existing corpus to reuse, or to write the corpus to")
+    parser.add_argument("--skip", metavar="GROUPS", type=lambda s: s.split(","), default=[], help="comma-seperated groups to skip: scoring, ingest, e2e")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="perfboard-bench-")
+    try:
+        corpus = args.corpus or os.path.join(work, "corpus")
+        truth_files = sorted(os.path.join(corpus, x) for x in os.listdir(corpus) if x.endswith(".json")) if args.corpus and os.path.isdir(corpus) else []
+        if not truth_files:
+            print "writing corpus of %d cases to %s..." % (args.cases, corpus)
+            truth_files = make_corpus(corpus, args.cases, args.hours, args.rate, args.seed)
+
+        benchmarks = {}
+        if "scoring" not in args.skip:
+            print "scoring..."
+            benchmarks.update(bench_scoring(truth_files, args.density, args.repeat, args.seed))
+        if "ingest" not in args.skip:
+            print "ingestion..."
+            benchmarks.update(bench_ingest(data_files(truth_files), args.repeat))
+        if "e2e" not in args.skip:
+            print "end to end..."
+            benchmarks.update(bench_e2e(truth_files, args.repeat, work))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    for b in benchmarks.values():
+        b["rate"] = b["count"] / b["best"] if b["best"] else None
+
+    params = dict((k, getattr(args, k)) for k in ("cases", "hours", "rate", "density", "repeat", "seed"))
+    results = dict(t=datetime.datetime.now().isoformat(), python=platform.python_version(), platform=platform.platform(),
+                   params=params, benchmarks=benchmarks)
+    write_json(results, args.out)
+    print "wrote %s" % args.out
+
+    if args.baseline:
+        baseline = read_json(args.baseline)
+        if baseline.get("params") != params:
+            print "WARNING: baseline parameters differ: %s" % baseline.get("params")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+    else:
+        compare(results, dict(benchmarks={}), args.tolerance)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import hashlib, inspect, json, os, sys, tempfile
+
+from util import to_json
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "perfboard")
+DEFAULT_CACHE_SIZE = 512 #MB
+
+class ResultCache(object):
+    """persistent on-disk cache of recognizer `get_results()` output, for reruns where the recognizer and data are unchanged.
+    entries are json files named by a hash of the recognizer module source, the recognizer class name, its constructor
+    arguments if any, the feed options that change its results, its `cache_key()` if it has one, and the size and mtime
+    of the raw data files. the least recently used entries are evicted once
+    the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE * 2**20):
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.sources = {} #source digest keyed on module name
+        if not os.path.isdir(self.path):
+            try:
+                os.makedirs(self.path)
+            except OSError: #created by another worker meanwhile
+                if not os.path.isdir(self.path):
+                    raise
+
+    def source_digest(self, module_name):
+        """return digest of the source of module `module_name`, or None if it has no source file"""
+        if module_name not in self.sources:
+            try:
+                with open(inspect.getsourcefile(sys.modules[module_name]), "rb") as f:
+                    self.sources[module_name] = hashlib.sha1(f.read()).hexdigest()
+            except (TypeError, IOError, KeyError):
+                self.sources[module_name] = None
+        return self.sources[module_name]
+
+    def key(self, rz, data_files, params=None, mode=None):
+        """return the cache key for the results of recognizer `rz` constructed with keyword arguments `params` and fed
+        `data_files` in the feed `mode` (a dict of the feed options that change its results), or None if it can't be
+        cached"""
+        cls = type(rz)
+        source = self.source_digest(cls.__module__)
+        if source is None:
+            return None
+        h = hashlib.sha1()
+        h.update("%s\0%s.%s\0" % (source, cls.__module__, cls.__name__))
+        if params:
+            h.update("%s\0" % json.dumps(params, sort_keys=True))
+        if mode:
+            h.update("mode\0%s\0" % json.dumps(mode, sort_keys=True))
+        get_key = getattr(rz, "cache_key", None) #recognizers predating `AbstractRecognizer.cache_key`
+        extra = get_key() if get_key else None
+        if extra is not None:
+            h.update("%s\0" % extra)
+        for data_file in data_files:
+            st = os.stat(data_file)
+            h.update("%s\0%d\0%r\0" % (os.path.abspath(data_file), st.st_size, st.st_mtime))
+        return h.hexdigest()
+
+    def entry_file(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def get(self, key):
+        """return the cached entry for `key`, or None on a miss"""
+        if key is None:
+            return None
+        fn = self.entry_file(key)
+        try:
+            with open(fn) as f:
+                entry = json.loads(f.read())
+        except (IOError, ValueError):
+            return None
+        try:
+            os.utime(fn, None) #mark as recently used
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        """store `entry` for `key`. the file is renamed into place so concurrent workers never read a partial entry"""
+        if key is None:
+            return
+        try:
+            s = json.dumps(entry, default=to_json)
+        except (TypeError, ValueError):
+            return #results that can't be json encoded are not cached
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(s)
+        os.rename(tmp, self.entry_file(key))
+
+    def evict(self):
+        """remove the least recently used entries until the cache fits in `max_size` bytes"""
+        entries = []
+        total = 0
+        for fn in os.listdir(self.path):
+            if not fn.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.path, fn))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, fn))
+            total += st.st_size
+        entries.sort()
+        for mtime, size, fn in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.path, fn))
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,248 @@
+import collections, datetime, gzip, heapq, json, math, re, sys, threading, Queue
+
+from iso8601.iso8601 import parse_date
+from score import to_epoch
+
+READ_SIZE = 1 << 16 #bytes read from a data file at a time when streaming
+PREFETCH_POLL = 0.1 #seconds between checks to stop of a blocked prefetch thread, and between interrupt checks
+
+BAD_ESCAPE = re.compile(r'\\([^"\\/bfnrtu])') #backslash not starting a valid json escape
+TOKEN = re.compile(r'["{}\[\]]')
+STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S) #rest of a json string after the opening quote
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+decoder = json.JSONDecoder()
+
+def open_data(data_file):
+    """open raw data file, gzipped if it ends with .gz"""
+    if data_file.endswith(".gz"):
+        return gzip.open(data_file)
+    return open(data_file)
+
+def repair_escapes(s):
+    """escape the backslashes in `s` that do not start a valid json escape"""
+    return BAD_ESCAPE.sub(r'\\\\\1', s)
+
+def read_records(data_file):
+    """read and decode the whole list of raw data records in `data_file`"""
+    return decode_records(read_data(data_file), data_file)
+
+def read_data(data_file):
+    """return the whole (gunzipped) contents of `data_file`"""
+    f = open_data(data_file)
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+def decode_records(chunk, data_file):
+    """decode the json list of raw data records `chunk` read from `data_file`"""
+    try:
+        return json.loads(chunk)
+    except ValueError:
+        print "FAILED to parse recs from %s" % data_file
+        print "trying to escape slashes and reparse..."
+        return json.loads(repair_escapes(chunk))
+
+def record_end(buf, pos):
+    """return the index just past the json object or array starting at `pos` in `buf`, or None if `buf` ends first.
+    only brackets and strings are scanned, so values with bad escapes can still be delimited."""
+    depth = 0
+    while True:
+        m = TOKEN.search(buf, pos)
+        if not m:
+            return None
+        c, pos = m.group(), m.end()
+        if c == '"':
+            m = STRING_END.match(buf, pos)
+            if not m:
+                return None
+            pos = m.end()
+        elif c == "{" or c == "[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+def iter_records(data_file, read_size=READ_SIZE):
+    """decode the json list of raw data records in `data_file` incrementally, yielding one record at a time.
+    only the undecoded tail of the file is buffered. a record that fails to decode is re-decoded with its
+    bad escapes repaired, without touching the rest of the file."""
+    f = open_data(data_file)
+    try:
+        buf, pos, eof = "", 0, False
+        started = False
+        while True:
+            pos = WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("unexpected end of records in %s" % data_file)
+                chunk = f.read(read_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                continue
+
+            c = buf[pos]
+            if not started:
+                if c != "[":
+                    raise ValueError("expected a list of records in %s" % data_file)
+                started = True
+                pos += 1
+                continue
+            if c == "]":
+                return
+            if c == ",":
+                pos += 1
+                continue
+
+            try:
+                rec, end = decoder.raw_decode(buf, pos)
+                if end == len(buf) and not eof:
+                    end = None #might be truncated, e.g. a number
+            except ValueError:
+                end = record_end(buf, pos)
+                if end is not None:
+                    print "FAILED to parse a record from %s, escaping slashes and reparsing..." % data_file
+                    rec = json.loads(repair_escapes(buf[pos:end]))
+                elif eof:
+                    raise
+
+            if end is None:
+                chunk = f.read(read_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                continue
+
+            pos = end
+            yield rec
+    finally:
+        f.close()
+
+def iter_batches(data_file, size):
+    """decode the records of `data_file` incrementally and yield them in lists of up to `size` records"""
+    return batched(iter_records(data_file), size)
+
+def batched(records, size):
+    """yield the iterable `records` in lists of up to `size` records"""
+    batch = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def timed_records(data_file):
+    """decode the records of `data_file` incrementally, yielding (epoch microseconds, record)"""
+    for rec in iter_records(data_file):
+        yield to_epoch(parse_date(rec["time"])), rec
+
+def merge_records(streams, names=None):
+    """merge the `streams` of (epoch microseconds, record), each in time order, into one stream of records in time order.
+    only the next record of each stream is held, in a heap keyed on its time, so any number of split or overlapping
+    data files can be merged as they are read. records with equal times keep the order of the streams.
+    a stream going back in time is merged as it comes, with a warning"""
+    def keyed(i, stream):
+        last, warned = None, False
+        for n, (t, rec) in enumerate(stream):
+            if last is not None and t < last and not warned:
+                print "WARNING: records of %s are not in time order, merging them as they come" % (names[i] if names else i)
+                warned = True
+            last = t
+            yield t, i, n, rec
+
+    for t, i, n, rec in heapq.merge(*[keyed(i, stream) for i, stream in enumerate(streams)]):
+        yield rec
+
+def merge_batches(streams, size, names=None):
+    """merge the record `streams` as `merge_records`, yielding lists of up to `size` records"""
+    return batched(merge_records(streams, names), size)
+
+def prefetch(items, depth):
+    """yield from the iterable `items` as it is produced ahead, by up to `depth` items, in a background thread, e.g. to
+    read, gunzip and decode the next batches of raw data while the recognizers process the current one. the items come
+    in their order, and an exception producing them is raised here. the thread stops when this generator is closed"""
+    q = Queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(msg):
+        while not stop.is_set():
+            try:
+                q.put(msg, timeout=PREFETCH_POLL)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(("item", item)):
+                    return
+            put(("end", None))
+        except Exception:
+            put(("error", sys.exc_info()))
+
+    thread = threading.Thread(target=produce, name="prefetch")
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            try:
+                kind, x = q.get(timeout=PREFETCH_POLL) #with a timeout, so waiting can be interrupted
+            except Queue.Empty:
+                continue
+            if kind == "item":
+                yield x
+            elif kind == "error":
+                raise x[0], x[1], x[2]
+            else:
+                return
+    finally:
+        stop.set()
+        thread.join()
+
+class SampleIntervals(object):
+    """online accumulator of the sampling intervals of raw data records, per record type.
+    an interval is a run of records of one type with gaps shorter than `max_gap` seconds, and only the
+    open interval of each type is updated as records stream past, so memory grows with the number of
+    intervals rather than records. with `rates`, the mean rate and jitter of each interval are kept too.
+    """
+
+    def __init__(self, max_gap=60, rates=False):
+        self.max_gap = datetime.timedelta(seconds=max_gap)
+        self.rates = rates
+        self.intervals = collections.defaultdict(list) #[t1, t2, count, sum of gaps, sum of squared gaps] keyed on type
+
+    def add(self, rec_type, t):
+        """add a record of type `rec_type` sampled at datetime `t`"""
+        si = self.intervals[rec_type]
+        if si:
+            x = si[-1]
+            gap = t - x[1]
+            if gap < self.max_gap:
+                x[1] = t
+                x[2] += 1
+                if self.rates:
+                    g = abs(gap.total_seconds()) #records are not always in time order
+                    x[3] += g
+                    x[4] += g * g
+                return
+        si.append([t, t, 1, 0.0, 0.0])
+
+    def interval_json(self, (t1, t2, count, s, ss)):
+        d = dict(t1=t1.isoformat(), t2=t2.isoformat(), count=count)
+        if self.rates:
+            n = count - 1 #gaps between samples
+            if n and s > 0:
+                mean = s / n
+                d["rate"] = 1 / mean
+                d["jitter"] = math.sqrt(max(ss / n - mean * mean, 0))
+            else:
+                d["rate"] = d["jitter"] = None
+        return d
+
+    def to_json(self):
+        """return dict of intervals and record count, keyed on record type"""
+        return dict((k, dict(intervals=map(self.interval_json, si), count=sum(x[2] for x in si)))
+                    for k, si in self.intervals.iteritems())
@@ -0,0 +1,347 @@
+import argparse, collections, glob, itertools, json, logging, os, shutil, tempfile
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+import ingest
+from score import to_epoch
+from util import read_json, write_json
+from iso8601.iso8601 import parse_date
+
+PACK_EXT = ".pack"
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+
+log = logging.getLogger("perfboard")
+
+# A packed data file is a directory next to the raw data file (`<data_file>.pack`) holding:
+#
+#   index.json       - source file size/mtime, record count, record types and the columns of each type
+#   _type.npy        - uint16 index into the record types, for every record in file order
+#   _row.npy         - int64 row of every record within the columns of its type
+#   _time.npy        - int64 epoch microseconds of every record
+#   <k>.<j>.npy      - column j of record type k: int64, float64, bool or utf-8 bytes, one row per record of the type
+#   <k>.<j>.bin/.off.npy - json encoded column j of type k (for nested or mixed values), offsets into the bytes per row.
+#                      an empty value means the record has no such field
+#
+# All arrays are opened memory mapped, so the recognizers can be handed numpy views without copying.
+
+DTYPES = {"int":np.int64, "float":np.float64, "bool":np.bool_}
+
+def kind_of(v):
+    """return the column kind for value `v`"""
+    if isinstance(v, bool):
+        return "bool"
+    if isinstance(v, (int, long)):
+        return "int" if -2**63 <= v < 2**63 else "json"
+    if isinstance(v, float):
+        return "float"
+    if isinstance(v, basestring):
+        return "str"
+    return "json"
+
+def pack_path(data_file):
+    return data_file + PACK_EXT
+
+def source_stat(data_file):
+    st = os.stat(data_file)
+    return dict(size=st.st_size, mtime=st.st_mtime)
+
+def is_packed(data_file):
+    """return True if `data_file` has an up to date packed version"""
+    try:
+        index = read_json(os.path.join(pack_path(data_file), INDEX_FILE))
+    except (IOError, ValueError):
+        return False
+    return index.get("version") == FORMAT_VERSION and index.get("source") == source_stat(data_file)
+
+def pack_file(data_file):
+    """convert the raw data file `data_file` to the packed columnar format, in `<data_file>.pack`"""
+    #1st pass: record types, and the kind, presence and width of their fields
+    types = collections.OrderedDict() #record count keyed on type
+    fields = collections.defaultdict(collections.OrderedDict) #[kind, count, width] keyed on type, field
+    for rec in ingest.iter_records(data_file):
+        t = rec.get("type")
+        types[t] = types.get(t, 0) + 1
+        for k, v in rec.iteritems():
+            if k == "type":
+                continue
+            kind = kind_of(v)
+            f = fields[t].get(k)
+            if f is None:
+                f = fields[t][k] = [kind, 0, 1]
+            elif f[0] != kind:
+                f[0] = "json"
+            f[1] += 1
+            if kind == "str":
+                f[2] = max(f[2], len(v.encode("utf-8")))
+
+    columns = {}
+    for t, fs in fields.iteritems():
+        columns[t] = []
+        for k, (kind, count, width) in fs.iteritems():
+            if count < types[t]: #missing in some records
+                kind = "json"
+            columns[t].append(dict(name=k, kind=kind, width=width))
+
+    type_list = types.keys()
+    type_index = dict((t, i) for i, t in enumerate(type_list))
+    n = sum(types.values())
+
+    out = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(data_file)), suffix=PACK_EXT)
+    try:
+        #2nd pass: fill the columns
+        rec_type = open_memmap(os.path.join(out, "_type.npy"), mode="w+", dtype=np.uint16, shape=(n,))
+        rec_row = open_memmap(os.path.join(out, "_row.npy"), mode="w+", dtype=np.int64, shape=(n,))
+        rec_time = open_memmap(os.path.join(out, "_time.npy"), mode="w+", dtype=np.int64, shape=(n,))
+
+        cols = {} #(array, json file, offsets) keyed on type, field
+        for k, t in enumerate(type_list):
+            for j, c in enumerate(columns.get(t, [])):
+                fn = os.path.join(out, "%d.%d" % (k, j))
+                if c["kind"] == "json":
+                    off = open_memmap(fn + ".off.npy", mode="w+", dtype=np.int64, shape=(types[t]+1,))
+                    cols[t, c["name"]] = (None, open(fn + ".bin", "wb"), off)
+                else:
+                    dtype = DTYPES.get(c["kind"], "S%d" % c["width"])
+                    cols[t, c["name"]] = (open_memmap(fn + ".npy", mode="w+", dtype=dtype, shape=(types[t],)), None, None)
+
+        rows = dict((t, 0) for t in type_list)
+        for i, rec in enumerate(ingest.iter_records(data_file)):
+            t = rec.get("type")
+            row = rows[t]
+            rows[t] += 1
+            rec_type[i] = type_index[t]
+            rec_row[i] = row
+            rec_time[i] = to_epoch(parse_date(rec["time"]))
+            for c in columns.get(t, []):
+                a, f, off = cols[t, c["name"]]
+                if f is not None:
+                    if c["name"] in rec:
+                        f.write(json.dumps(rec[c["name"]]))
+                    off[row+1] = f.tell()
+                elif c["kind"] == "str":
+                    a[row] = rec[c["name"]].encode("utf-8")
+                else:
+                    a[row] = rec[c["name"]]
+
+        for a, f, off in cols.values():
+            if f is not None:
+                f.close()
+                off.flush()
+            else:
+                a.flush()
+        for a in (rec_type, rec_row, rec_time):
+            a.flush()
+        del cols, rec_type, rec_row, rec_time
+
+        write_json(dict(version=FORMAT_VERSION, source=source_stat(data_file), count=n, types=type_list,
+                        counts=[types[t] for t in type_list], columns=[columns.get(t, []) for t in type_list]),
+                   os.path.join(out, INDEX_FILE))
+
+        dest = pack_path(data_file)
+        if os.path.exists(dest):
+            shutil.rmtree(dest)
+        os.rename(out, dest)
+    except:
+        shutil.rmtree(out, ignore_errors=True)
+        raise
+    return n
+
+class PackedFile(object):
+    """memory mapped columns of a packed data file. columns are only mapped when first used"""
+
+    def __init__(self, data_file):
+        self.path = pack_path(data_file)
+        self.index = read_json(os.path.join(self.path, INDEX_FILE))
+        self.types = self.index["types"]
+        self.columns = [dict((c["name"], (j, c)) for j, c in enumerate(cols)) for cols in self.index["columns"]]
+        self.arrays = {}
+        self.rec_type = self.array("_type")
+        self.rec_row = self.array("_row")
+        self.rec_time = self.array("_time")
+
+    def array(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self.arrays[name]
+
+    def blob(self, name):
+        if name not in self.arrays:
+            fn = os.path.join(self.path, name + ".bin")
+            if os.path.getsize(fn):
+                self.arrays[name] = np.memmap(fn, dtype=np.uint8, mode="r")
+            else:
+                self.arrays[name] = np.zeros(0, dtype=np.uint8)
+        return self.arrays[name]
+
+    def column(self, k, field):
+        """return the memory mapped column `field` of the records of type index `k`.
+        json encoded columns are returned as (bytes, offsets)"""
+        j, c = self.columns[k][field]
+        name = "%d.%d" % (k, j)
+        if c["kind"] == "json":
+            return self.blob(name), self.array(name + ".off")
+        return self.array(name)
+
+    def value(self, k, field, row):
+        """return `field` of row `row` of record type index `k` as decoded from json, raise KeyError if missing"""
+        j, c = self.columns[k][field]
+        col = self.column(k, field)
+        if c["kind"] == "json":
+            blob, off = col
+            a, b = off[row], off[row+1]
+            if a == b:
+                raise KeyError(field)
+            return json.loads(blob[a:b].tostring())
+        v = col[row]
+        if c["kind"] == "str":
+            return v.decode("utf-8")
+        return v.item()
+
+    def has(self, k, field, row):
+        j, c = self.columns[k].get(field, (None, None))
+        if c is None:
+            return False
+        if c["kind"] == "json":
+            blob, off = self.column(k, field)
+            return off[row] != off[row+1]
+        return True
+
+class PackedRecords(object):
+    """raw data records `start` to `stop` of a packed data file, as a read-only sequence of lazy dict-like records.
+    recognizers written for dict records can iterate over it as usual, while `times` and `column` give numpy views
+    of the memory mapped columns without copying. `index`, if given, is an array of the record numbers instead,
+    e.g. to `select` only some record types."""
+
+    def __init__(self, data_file, start=0, stop=None, packed=None, index=None):
+        self.packed = packed or PackedFile(data_file)
+        self.data_file = data_file
+        n = self.packed.index["count"]
+        self.start, self.stop = start, n if stop is None else min(stop, n)
+        self.index = index
+
+    def __len__(self):
+        if self.index is not None:
+            return len(self.index)
+        return max(self.stop - self.start, 0)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("packed records only support contiguous slices")
+            if self.index is not None:
+                return PackedRecords(self.data_file, packed=self.packed, index=self.index[start:stop])
+            return PackedRecords(self.data_file, self.start + start, self.start + stop, self.packed)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return PackedRecord(self.packed, self.start + i if self.index is None else int(self.index[i]))
+
+    def __iter__(self):
+        for i in (xrange(self.start, self.stop) if self.index is None else self.index.tolist()):
+            yield PackedRecord(self.packed, i)
+
+    def of(self, a):
+        """return the part of per-record array `a` (e.g. `rec_time`) of these records"""
+        return a[self.start:self.stop] if self.index is None else a[self.index]
+
+    def select(self, rec_types):
+        """return `PackedRecords` of only the records of the types in `rec_types`, without decoding any record"""
+        ks = [k for k, t in enumerate(self.packed.types) if t in rec_types]
+        index = np.arange(self.start, self.stop) if self.index is None else self.index
+        return PackedRecords(self.data_file, packed=self.packed, index=index[np.in1d(self.of(self.packed.rec_type), ks)])
+
+    def types(self):
+        """return list of the record types in the file"""
+        return list(self.packed.types)
+
+    def rows(self, rec_type):
+        """return the range of rows of the columns of `rec_type` that are within these records"""
+        k = self.packed.types.index(rec_type)
+        if self.index is None and self.start == 0 and self.stop == self.packed.index["count"]:
+            return 0, self.packed.index["counts"][k]
+        rows = self.of(self.packed.rec_row)[self.of(self.packed.rec_type) == k]
+        if not len(rows):
+            return 0, 0
+        return int(rows[0]), int(rows[-1]) + 1
+
+    def times(self, rec_type=None):
+        """return epoch microseconds of the records, or only those of `rec_type`"""
+        if rec_type is None:
+            return self.of(self.packed.rec_time)
+        k = self.packed.types.index(rec_type)
+        return self.of(self.packed.rec_time)[self.of(self.packed.rec_type) == k]
+
+    def column(self, rec_type, field):
+        """return numpy view of `field` of the records of `rec_type`.
+        json encoded columns (nested or mixed values) are returned as (bytes, offsets)."""
+        k = self.packed.types.index(rec_type)
+        a, b = self.rows(rec_type)
+        col = self.packed.column(k, field)
+        if isinstance(col, tuple):
+            blob, off = col
+            return blob, off[a:b+1]
+        return col[a:b]
+
+class PackedRecord(collections.Mapping):
+    """read-only, dict-like view of one packed record. fields are decoded when accessed"""
+    __slots__ = ("packed", "k", "row")
+
+    def __init__(self, packed, i):
+        self.packed = packed
+        self.k = int(packed.rec_type[i])
+        self.row = int(packed.rec_row[i])
+
+    def __getitem__(self, key):
+        if key == "type" and self.packed.types[self.k] is not None:
+            return self.packed.types[self.k]
+        if key not in self.packed.columns[self.k]:
+            raise KeyError(key)
+        return self.packed.value(self.k, key, self.row)
+
+    def __iter__(self):
+        if self.packed.types[self.k] is not None:
+            yield "type"
+        for field in self.packed.columns[self.k]:
+            if self.packed.has(self.k, field, self.row):
+                yield field
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+def timed_records(data_file):
+    """return iterator of (epoch microseconds, record) of the records of packed `data_file`, as `ingest.timed_records`"""
+    recs = PackedRecords(data_file)
+    return itertools.izip(recs.times().tolist(), recs)
+
+def read_packed(data_file, batch_size=0):
+    """return list of `PackedRecords` batches of up to `batch_size` records (default all) of packed `data_file`"""
+    recs = PackedRecords(data_file)
+    if not batch_size:
+        return [recs]
+    return [recs[i:i+batch_size] for i in xrange(0, len(recs), batch_size)]
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="perfboard.py pack", description="convert the raw data files of ground truth files to the packed columnar format")
+    parser.add_argument("truths", metavar='TRUTH_FILE', type=str, nargs="+", help='ground truth files')
+    parser.add_argument("--force", action="store_true", default=False, help="repack data files that are already packed")
+    args = parser.parse_args(argv)
+
+    for truth_file in args.truths:
+        d = read_json(truth_file)
+        head, tail = os.path.split(truth_file)
+        for data_file in glob.glob(os.path.join(head, d["data_path"])):
+            if os.path.isdir(data_file):
+                continue
+            if not args.force and is_packed(data_file):
+                log.info("%s is already packed" % data_file)
+                continue
+            log.info("packing %s..." % data_file)
+            n = pack_file(data_file)
+            log.info("packed %d records to %s" % (n, pack_path(data_file)))
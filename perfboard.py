@@ -1,22 +1,34 @@
 #!/usr/bin/env python
 
-import argparse, commands, collections, shutil
+import argparse, commands, collections, hashlib, heapq, inspect, itertools, operator, shutil
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import datetime
 import json
 import os
-import glob, gzip
+import glob
 import logging
 import pprint, re
+import sys
 import time
 
+import ingest
+import pack
 import score
+import timeline
+import timing
 
-from util import read_json, write_json
+from cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE
+import util
+from util import read_json, write_json, to_json
 from iso8601.iso8601 import parse_date
 
 DEFAULT_OUTPATH = "static"
 SCORES_DIR = "scores"
 MAX_SAMPLE_RATE = 60
+MERGE_BATCH_SIZE = 10000 #records per batch of merged data files, unless --batch-size is given
+DEFAULT_TIMELINE = 5000 #segments of a case over which its timeline tiles are written
+DEFAULT_RESAMPLES = 1000 #bootstrap resamples of the aggregate scores
 
 log = None
 
@@ -35,100 +47,171 @@ def csv(value):
     """Return list of strings from comma seperated string"""
     return map(str, value.split(",")) 
 
+def json_arg(value):
+    """Return the json value of a string, or of the json file it names"""
+    if os.path.isfile(value):
+        with open(value) as f:
+            return json.load(f, object_pairs_hook=collections.OrderedDict)
+    return json.loads(value, object_pairs_hook=collections.OrderedDict)
+
 def json_encode(obj):
     return json.dumps(obj, default=lambda obj: obj.isoformat() if isinstance(obj, datetime.datetime) else None)
 
 SCORES_FILE = "scores/scores.json"        #hold latest scores
 SCORES_LIST = "scores/scores_list.json"
+CASES_DIR = "cases-%s"                    #case detail files of a run, in SCORES_DIR
+HISTORY_FILE = "scores/history.jsonl"     #one line of aggregate scores per run and recognizer
+SWEEP_FILE = "scores/sweep-%s.json"       #ranked scores of the configurations of a sweep
+PARTIAL_FILE = "scores/partial-%d-of-%d.jsonl" #results of a shard of a run, to merge
+DETAIL_KEYS = ("labels", "detected", "scores", "sample_intervals") #only in the case detail files
 
 def main():
     init_logging()
 
+    if len(sys.argv) > 1 and sys.argv[1] == "pack":
+        return pack.main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep":
+        return sweep(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        return merge_partials(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="performance metric dashboard for continuous context recognition")
     parser.add_argument("truths", metavar='TRUTH_FILE', type=str, nargs="+", help='ground truth files')
     parser.add_argument("--outpath", metavar="OUTPUT_PATH", type=str, default=DEFAULT_OUTPATH, help="dir to write `scores.json`")
     parser.add_argument("--norotate", action="store_true", default=False, help="to disable rotating scores")
+    parser.add_argument("--keep", metavar="N", type=int, default=0, help="keep only the N latest rotated scores files, the run history is always kept (default: keep all)")
     parser.add_argument("--debug", action="store_true", default=False, help="add extra debugging info to the result scores")
+    parser.add_argument("--sample-rates", action="store_true", default=False, help="with --debug, add the mean rate and jitter of each sampling interval")
+    add_run_arguments(parser)
+    add_timeline_argument(parser)
+    add_bootstrap_arguments(parser)
+    parser.add_argument("--profile", metavar="STATS_FILE", type=str, help="profile the run with cProfile and write the stats to STATS_FILE (serial runs only)")
+    parser.add_argument("--profile-stages", metavar="STAGES", type=csv, default=[], help="comma-seperated stages to profile: read, decode, process, get_results, score, write, timeline (default: all)")
+    parser.add_argument("--timing-hook", metavar="FUNCTION", type=str, help="fully qualified name of a function called as f(event, stage, key) at the start and end of every timed stage (serial runs only)")
+    parser.add_argument("--watch", action="store_true", default=False, help="keep running after the scores are written, and re-score the cases and recognizers whose ground truth, raw data or recognizer source changes")
+    parser.add_argument("--poll", metavar="SECONDS", type=float, default=2.0, help="with --watch, how often to check for changes (default: %(default)s)")
+    parser.add_argument("--shard", metavar="k/N", type=shard_arg, help="evaluate only shard k of N of the ground truth files, and write the results to a partial file to combine with `perfboard.py merge`")
     parser.add_argument("--recognizers", metavar="RECOGNIZERS", type=csv, default=[], required=True, help="comma-seperated fully qualified class names of recognizers to use")
 
     args = parser.parse_args()
+    if args.shard and args.watch:
+        parser.error("--watch can't be used with --shard, watch the merged scores instead")
+
+    started = time.time()
+    t = datetime.datetime.now().isoformat()
+    hooks = []
+    if args.profile:
+        profiler = timing.ProfileHook(args.profile_stages)
+        hooks.append(profiler)
+    if args.timing_hook:
+        module_name, func = args.timing_hook.rsplit(".", 1)
+        hooks.append(getattr(import_name(module_name), func))
+    timings = timing.Timings(hooks)
+
+    truths = args.truths
+    if args.shard:
+        truths = shard_truths(args.truths, *args.shard)
+        log.info("evaluating shard %d/%d: %d of %d ground truth files..." % (args.shard + (len(truths), len(args.truths))))
+
+    if args.jobs > 1:
+        pool = multiprocessing.Pool(args.jobs, init_worker, (args.recognizers,))
+        cases = pool.imap(evaluate_worker, [(truth_file, args) for truth_file in truths])
+    else:
+        rzs = init_recognizers(args.recognizers)
+        cases = ((evaluate(truth_file, rzs, args, timings), None) for truth_file in truths)
+
+    if args.shard:
+        write_partial(args, cases, timings, t, started)
+    else:
+        cases_dir = os.path.join(SCORES_DIR, CASES_DIR % t)
+        os.makedirs(os.path.join(args.outpath, cases_dir))
+        run = RunScores(args.outpath, cases_dir, timings, args.timeline)
+        pairs = collections.OrderedDict() #[detail file, Aggregate, summary, Rollup] keyed on (truth file, recognizer), with --watch
+
+        for case, case_timings in cases: #results in truth file order, as for a serial run
+            if case_timings:
+                timings.merge(case_timings)
+            for res in case:
+                res_agg, res_rollup = result_aggregates(res, args.bootstrap_block)
+                detail = run.add(res, res_agg, res_rollup)
+                if args.watch:
+                    pairs[res["labels_file"], res["recognizer"]] = [detail, res_agg, run.summaries[-1], res_rollup]
+
+    if args.jobs > 1:
+        pool.close()
+        pool.join()
+
+    scored = None if args.shard else run.to_json(t, args.bootstrap, args.bootstrap_seed)
+
+    for line in timings.summary():
+        log.info(line)
+    if args.profile:
+        log.info("writing profile stats to %s..." % args.profile)
+        profiler.dump(args.profile)
+    if args.shard:
+        return
 
-    rzs = init_recognizers(args.recognizers)
-
-    results = []
-
-    recogs = collections.defaultdict(int)
-
-    for truth_file in args.truths:
-        log.info("processing %s..." % truth_file)
-        d = read_json(truth_file) #read the ground truth files
-
-        head, tail = os.path.split(truth_file)
-        data_path =  os.path.join(head, d["data_path"])
-
-        sample_times = collections.defaultdict(list)
-
-        for data_file in glob.glob(data_path):
-            log.info("reading data from %s..." % data_file)
-
-            if data_file.endswith(".gz"):
-                chunk = gzip.open(data_file).read()
-            else:
-                chunk = open(data_file).read()
-
-            try:
-                recs = json.loads(chunk)
-            except:
-                print "FAILED to parse recs from %s" % data_file
-                print "trying to escape slashes and reparse..."
-                s = re.sub(r'\\[^\\]', r'\\\\', chunk) 
-                recs = json.loads(s)
-                
-            if recs:
-                d["t1"] = min([recs[0]["time"], ])
-                d["t2"] = max([recs[-1]["time"], ])
-
-            for rz in rzs.values():
-                rz.process(recs) #feed raw data to each of the recognizers
-
-            if args.debug:
-                
-                for rec in recs:
-                    sample_times[rec["type"]].append(parse_date(rec["time"]))
-
-        if args.debug:
-            #sampling intervals 
-            d["sample_intervals"] = {}
-            for k, v in sample_times.iteritems():
-                si = []
-                for i in v:
-                    if si and (i - si[-1][1]) < datetime.timedelta(seconds=MAX_SAMPLE_RATE):
-                        si[-1][1] = i
-                        si[-1][2] += 1
-                    else:
-                        si.append( [i, i, 1] )
-                intervals = map(lambda x: dict(t1=x[0].isoformat(), t2=x[1].isoformat(), count=x[2]), si)
-                d["sample_intervals"][k] = dict(intervals=intervals, count=len(v)) 
-
-        for rz_name, rz in rzs.iteritems():        
-            log.info("evaluating recognizer %s for labels %s..." % (rz, rz.labels_supported()))
-            res = d.copy()
-            res["detected"] = rz.get_results()
-            res["labels"] = [x for x in res["labels"] if x["label"] in rz.labels_supported()] 
-            res["scores"] = score.score_results(res)
-            res["recognizer"] = rz_name
-            recogs[res["recognizer"]] += 1
-            res["labels_file"] = truth_file
-            results.append(res)
-
-            rz.reset()
-
-    scored = score.score_aggregate(results)
-    scored["results"] = results
-    scored["recognizers"] = recogs.keys()
-    scored["t"] = datetime.datetime.now().isoformat()
-
+    publish(args, run, scored, t, corpus_fingerprint(args.truths), started)
+
+    if args.watch:
+        watch(args, rzs if args.jobs == 1 else init_recognizers(args.recognizers), pairs, run.cases_dir, timings)
+
+class RunScores(object):
+    """the aggregate scores and case summaries of the results of a run, added in the order of the run. the full result
+    of each case is written to its case detail file in `cases_dir` as it is added, with its timeline tiles if it has
+    more than `timeline` segments (0 for none)"""
+
+    def __init__(self, outpath, cases_dir, timings, timeline=0):
+        self.outpath, self.cases_dir, self.timings = outpath, cases_dir, timings
+        self.timeline = timeline #write the timeline tiles of cases with more segments
+        self.agg = score.Aggregate()
+        self.rz_aggs = collections.defaultdict(score.Aggregate) #keyed on recognizer, for the run history
+        self.rollup = score.Rollup() #per recognizer, label, device and date
+        self.recogs = collections.defaultdict(int) #cases keyed on recognizer
+        self.summaries = []
+
+    def add(self, res, agg, rollup):
+        """add scored result `res`, with the `score.Aggregate` and `score.Rollup` of it alone, return its detail file"""
+        self.recogs[res["recognizer"]] += 1
+        self.agg.merge(agg)
+        self.rz_aggs[res["recognizer"]].merge(agg)
+        self.rollup.merge(rollup)
+        #write the full result as soon as it is scored, keep only its headline numbers
+        detail = case_file(self.cases_dir, len(self.summaries) + 1, res)
+        self.summaries.append(write_case(res, self.outpath, detail, self.timings, self.timeline))
+        return detail
+
+    def to_json(self, t, resamples=0, seed=0):
+        return scores_json(self.agg, self.rollup, self.summaries, self.recogs.keys(), t, self.cases_dir, self.timings, resamples, seed)
+
+def write_case(res, outpath, detail, timings, min_segments=0, atomic=False):
+    """write scored result `res` to its case detail file `detail` and, if it has more than `min_segments` segments
+    (and that is not 0), its timeline tiles, removing any previous ones. return its case summary"""
+    with timings.stage("write") as st:
+        write_json(res, os.path.join(outpath, detail), atomic=atomic)
+        st.count += 1
+    summary = case_summary(res, detail)
+    if min_segments and summary["stats"]["segment_count"] > min_segments:
+        with timings.stage("timeline") as st:
+            summary["timeline"] = timeline.write_tiles(res, outpath, detail)
+            st.count += summary["timeline"]["tiles"]
+    elif atomic:
+        timeline.remove_tiles(outpath, detail)
+    return summary
+
+def result_aggregates(res, block=0):
+    """return the `score.Aggregate` and `score.Rollup` of scored result `res` alone, to merge with those of others.
+    the aggregate is resampled by `block` seconds of the case, if given"""
+    agg, rollup = score.Aggregate(), score.Rollup()
+    agg.add(res, block)
+    rollup.add(res)
+    return agg, rollup
+
+def publish(args, run, scored, t, corpus, started):
+    """write the scores file `scored` of the `RunScores` `run`, rotating the previous one per `args`, and append the
+    aggregate scores of each recognizer to the run history"""
     sf = os.path.join(args.outpath, SCORES_FILE)
+    old_cases = None
     if os.path.exists(sf):
         if not args.norotate:
             #copy existing scores.json to scores-<iso time>.json, update scores_history
@@ -140,7 +223,7 @@ def main():
             fn = os.path.join(SCORES_DIR, "%s-%s.%s"%(name,dt,ext))
             nf = os.path.join(args.outpath, fn)
             log.info("rotating %s to %s..." % (sf, nf))
-            shutil.copyfile(sf, nf)
+            shutil.copyfile(sf, nf) #still refers to the case detail files of its own run
 
             sl = os.path.join(args.outpath, SCORES_LIST)
             log.info("updating %s..." % sl)        
@@ -152,17 +235,699 @@ def main():
                 if not l[0] == ds:
                     l.insert(0, ds)
                 l.insert(1, fn)
+                if args.keep:
+                    prune_snapshots(args.outpath, l[1+args.keep:])
+                    del l[1+args.keep:]
                 write_json(l, sl)
             
+        else:
+            old_cases = read_json(sf).get("cases_dir") #replaced, along with its case details
+
     log.info("writing %s..." % sf)        
-    write_json(scored, sf)
+    write_json(scored, sf, atomic=True)
+
+    if old_cases and old_cases != run.cases_dir:
+        shutil.rmtree(os.path.join(args.outpath, old_cases), ignore_errors=True)
+
+    elapsed = time.time() - started
+    hf = os.path.join(args.outpath, HISTORY_FILE)
+    log.info("appending to %s..." % hf)
+    with open(hf, "a") as f:
+        for rz_name in sorted(run.rz_aggs):
+            d = run.rz_aggs[rz_name].to_json(args.bootstrap, args.bootstrap_seed)
+            f.write(json.dumps(dict(t=t, recognizer=rz_name, cases=run.recogs[rz_name], corpus=corpus, elapsed=elapsed,
+                                    scores=d["scores"], stats=d["stats"])) + "\n")
+
+def shard_arg(value):
+    """Return (k, N) from shard string "k/N", 1 <= k <= N"""
+    try:
+        k, n = map(int, value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must be given as k/N, e.g. 1/4")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError("shard k/N must have 1 <= k <= N")
+    return k, n
+
+def shard_truths(truth_files, k, n):
+    """return the ground truth files of shard `k` (1 to `n`) of `truth_files`, in their order. files are assigned to
+    shards by a hash of their normalized path, the same on every node given the same paths"""
+    return [x for x in truth_files if int(hashlib.sha1(os.path.normpath(x)).hexdigest(), 16) % n == k - 1]
+
+def write_partial(args, cases, timings, t, started):
+    """write the results of the `cases` of a shard run to its partial file, one json line each, between a header line
+    with what the shard is part of and a footer line with its timings, for `merge_partials`"""
+    pf = os.path.join(args.outpath, PARTIAL_FILE % args.shard)
+    if not os.path.isdir(os.path.dirname(pf)):
+        os.makedirs(os.path.dirname(pf))
+    header = dict(shard=args.shard, truths=args.truths, recognizers=args.recognizers, t=t, corpus=corpus_fingerprint(args.truths))
+    with util.atomic_open(pf) as f:
+        f.write(json.dumps(header) + "\n")
+        for case, case_timings in cases:
+            if case_timings:
+                timings.merge(case_timings)
+            for res in case:
+                res_agg, res_rollup = result_aggregates(res, args.bootstrap_block)
+                with timings.stage("write") as st:
+                    f.write(json.dumps(dict(result=res, aggregate=res_agg.summary(), rollup=res_rollup.to_json()), default=to_json) + "\n")
+                    st.count += 1
+        f.write(json.dumps(dict(timings=timings.to_json(), elapsed=time.time() - started)) + "\n")
+    log.info("wrote %s" % pf)
+
+def merge_partials(argv):
+    """combine the partial files of shard runs into the scores file and run history, as a single run would write them"""
+    parser = argparse.ArgumentParser(prog="perfboard.py merge", description="combine the partial results of sharded runs into the scores of one run")
+    parser.add_argument("partials", metavar="PARTIAL_FILE", type=str, nargs="+", help="partial files written by runs with --shard")
+    parser.add_argument("--outpath", metavar="OUTPUT_PATH", type=str, default=DEFAULT_OUTPATH, help="dir to write `scores.json`")
+    parser.add_argument("--norotate", action="store_true", default=False, help="to disable rotating scores")
+    parser.add_argument("--keep", metavar="N", type=int, default=0, help="keep only the N latest rotated scores files, the run history is always kept (default: keep all)")
+    add_timeline_argument(parser)
+    add_bootstrap_arguments(parser, blocks=False)
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    t = datetime.datetime.now().isoformat()
+    timings = timing.Timings()
+
+    files = [open(x) for x in args.partials]
+    headers = []
+    for fn, f in zip(args.partials, files):
+        try:
+            headers.append(json.loads(f.readline()))
+        except ValueError:
+            parser.error("%s is not a partial file" % fn)
+    h = headers[0]
+    shards = collections.defaultdict(list)
+    for fn, x in zip(args.partials, headers):
+        if x["truths"] != h["truths"] or x["recognizers"] != h["recognizers"] or x["shard"][1] != h["shard"][1]:
+            parser.error("%s is a shard of another run than %s" % (fn, args.partials[0]))
+        shards[x["shard"][0]].append(fn)
+    for k, fns in sorted(shards.iteritems()):
+        if len(fns) > 1:
+            parser.error("shard %d/%d is in several partial files: %s" % (k, h["shard"][1], ", ".join(fns)))
+    missing = [k for k in xrange(1, h["shard"][1] + 1) if k not in shards]
+    if missing:
+        log.warning("merging without shards %s of %d" % (", ".join(map(str, missing)), h["shard"][1]))
+    if len(set(x["corpus"] for x in headers)) > 1:
+        log.warning("the shards were run on different ground truth or raw data files")
+
+    cases_dir = os.path.join(SCORES_DIR, CASES_DIR % t)
+    os.makedirs(os.path.join(args.outpath, cases_dir))
+    run = RunScores(args.outpath, cases_dir, timings, args.timeline)
+
+    #each partial file holds its cases in truth file order, so their results interleave back into the order of a run
+    order = dict((truth_file, i) for i, truth_file in enumerate(h["truths"]))
+    elapsed = 0
+    try:
+        for key, d in heapq.merge(*[partial_lines(fn, f, order, k) for k, (fn, f) in enumerate(zip(args.partials, files))]):
+            if "timings" in d:
+                timings.merge(timing.Timings.from_json(d["timings"]))
+                elapsed = max(elapsed, d["elapsed"])
+                continue
+            run.add(d["result"], score.Aggregate.from_summary(d["aggregate"]), score.Rollup.from_json(d["rollup"]))
+    except ValueError as e:
+        shutil.rmtree(os.path.join(args.outpath, cases_dir), ignore_errors=True)
+        parser.error(str(e))
+    for f in files:
+        f.close()
+
+    scored = run.to_json(t, args.bootstrap, args.bootstrap_seed)
+    for line in timings.summary():
+        log.info(line)
+    #the run took as long as its slowest shard, plus the merge
+    publish(args, run, scored, t, h["corpus"], started - elapsed)
+
+def partial_lines(fn, f, order, k):
+    """yield the decoded result lines of the open partial file `f` of shard `k`, keyed on (truth file index, `k`, line
+    number) for merging in run order, then its footer line last"""
+    n = 0
+    for n, line in enumerate(f, 1):
+        try:
+            d = json.loads(line)
+        except ValueError:
+            raise ValueError("%s is corrupt at line %d" % (fn, n + 1))
+        if "timings" in d:
+            yield (len(order), k, n), d
+            return
+        yield (order[d["result"]["labels_file"]], k, n), d
+    raise ValueError("%s is incomplete, without its footer line after %d results" % (fn, n))
+
+def add_timeline_argument(parser):
+    parser.add_argument("--timeline", metavar="N", type=int, default=DEFAULT_TIMELINE, help="write level of detail timeline tiles of the cases with more than N segments, for the dashboard to draw them without loading the whole case (default: %(default)s, 0 for none)")
+
+def add_bootstrap_arguments(parser, blocks=True):
+    parser.add_argument("--bootstrap", metavar="N", type=int, default=DEFAULT_RESAMPLES, help="add bootstrap confidence intervals of the aggregate frame and event rates, from N resamples of the cases (default: %(default)s, 0 for none)")
+    parser.add_argument("--bootstrap-seed", metavar="SEED", type=int, default=0, help="random seed of the bootstrap resamples, the same seed giving the same intervals (default: %(default)s)")
+    if blocks:
+        parser.add_argument("--bootstrap-block", metavar="SECONDS", type=float, default=0, help="resample blocks of SECONDS of the cases instead of whole cases, e.g. for a few long cases")
+
+def add_run_arguments(parser):
+    """add the options of how the raw data is fed to the recognizers and their results are cached to `parser`"""
+    parser.add_argument("--batch-size", metavar="N", type=int, default=0, help="decode data files incrementally and feed them to the recognizers in batches of N records (default: whole files)")
+    parser.add_argument("--merge", action="store_true", default=False, help="merge the records of all the raw data files of a ground truth file in time order, and feed them in batches (of --batch-size, default %d)" % MERGE_BATCH_SIZE)
+    parser.add_argument("--window", metavar="SECONDS", type=float, default=0, help="feed the raw data in time windows of SECONDS, and score the results of each window incrementally from `get_results(time_range)`")
+    parser.add_argument("--prefetch", metavar="N", type=int, default=0, help="read and decode up to N batches of raw data (whole files, without --batch-size) ahead in a background thread, while the recognizers process the current one")
+    parser.add_argument("--jobs", metavar="N", type=int, default=1, help="evaluate the ground truth files in N worker processes")
+    parser.add_argument("--rz-threads", metavar="N", type=int, default=1, help="run the recognizers concurrently on each chunk of raw data, in N threads")
+    parser.add_argument("--no-cache", action="store_true", default=False, help="always run the recognizers, ignoring cached results")
+    parser.add_argument("--cache-dir", metavar="CACHE_DIR", type=str, default=DEFAULT_CACHE_DIR, help="dir of cached recognizer results (default: %(default)s)")
+    parser.add_argument("--cache-size", metavar="MB", type=int, default=DEFAULT_CACHE_SIZE, help="size limit of the result cache (default: %(default)s)")
+
+def sweep(argv):
+    """evaluate many configurations of one recognizer class together, so the raw data of each case is decoded once and
+    fed to all of them, and write their aggregate scores ranked by frame accuracy to a sweep file"""
+    parser = argparse.ArgumentParser(prog="perfboard.py sweep", description="compare configurations of a recognizer on the same ground truth files")
+    parser.add_argument("truths", metavar='TRUTH_FILE', type=str, nargs="+", help='ground truth files')
+    parser.add_argument("--recognizer", metavar="RECOGNIZER", type=str, required=True, help="fully qualified class name of the recognizer")
+    parser.add_argument("--grid", metavar="JSON", type=json_arg, help="json object (or file of one) of lists of values of constructor keyword arguments, every combination of which is a configuration")
+    parser.add_argument("--configs", metavar="JSON", type=json_arg, help="json list (or file of one) of objects of constructor keyword arguments, each a configuration")
+    parser.add_argument("--outpath", metavar="OUTPUT_PATH", type=str, default=DEFAULT_OUTPATH, help="dir to write the sweep file to")
+    add_run_arguments(parser)
+    add_bootstrap_arguments(parser)
+    parser.set_defaults(debug=False, sample_rates=False)
+    args = parser.parse_args(argv)
+
+    try:
+        params = sweep_params(args.recognizer, args.grid, args.configs)
+    except ValueError as e:
+        parser.error(str(e))
+    if not params:
+        parser.error("no configurations, give them with --grid or --configs")
+    log.info("sweeping %d configurations of %s..." % (len(params), args.recognizer))
+
+    t = datetime.datetime.now().isoformat()
+    timings = timing.Timings()
+    aggs = collections.OrderedDict((rz_name, score.Aggregate()) for rz_name in params)
+
+    if args.jobs > 1:
+        pool = multiprocessing.Pool(args.jobs, init_worker, (params.keys(), params))
+        cases = pool.imap(evaluate_worker, [(truth_file, args) for truth_file in args.truths])
+    else:
+        rzs = init_recognizers(params.keys(), params)
+        cases = ((evaluate(truth_file, rzs, args, timings, params), None) for truth_file in args.truths)
+
+    for case, case_timings in cases:
+        if case_timings:
+            timings.merge(case_timings)
+        for res in case:
+            aggs[res["recognizer"]].add(res, args.bootstrap_block)
+
+    if args.jobs > 1:
+        pool.close()
+        pool.join()
+
+    swept = sweep_json(args, aggs, params, t, timings)
+
+    for line in timings.summary():
+        log.info(line)
+    log.info("%4s %8s %17s %8s %8s %8s  %s" % ("rank", "acc", "acc ci", "correct", "deleted", "inserted", "configuration"))
+    for x in swept["configs"]:
+        acc = "%8.4f" % x["acc"] if x["acc"] is not None else "%8s" % "-"
+        ci = x["ci"] and x["ci"]["frame_scores"].get("acc")
+        acc += " [%.4f, %.4f]" % tuple(ci) if ci else " %17s" % "-"
+        events = x["event_scores"]
+        log.info("%4d %s %8d %8d %8d  %s" % (x["rank"], acc, events["t_counts"].get(score.CORRECT, 0),
+                 events["t_counts"].get(score.EVENT_DELETION, 0), events["d_counts"].get(score.INSERTION_RETURN, 0), x["recognizer"]))
+
+    sf = os.path.join(args.outpath, SWEEP_FILE % t)
+    if not os.path.isdir(os.path.dirname(sf)):
+        os.makedirs(os.path.dirname(sf))
+    log.info("writing %s..." % sf)
+    write_json(swept, sf)
+
+def sweep_params(class_name, grid=None, configs=None):
+    """return the constructor keyword arguments of each configuration of recognizer `class_name` keyed on its name
+    (see `config_name`): those in the list `configs`, then every combination of the values listed in `grid`"""
+    if not isinstance(configs or [], list) or not all(isinstance(x, dict) for x in configs or []):
+        raise ValueError("--configs must be a list of objects")
+    if not isinstance(grid or {}, dict):
+        raise ValueError("--grid must be an object")
+    configs = list(configs or [])
+    if grid:
+        keys = grid.keys()
+        values = [v if isinstance(v, list) else [v] for v in grid.values()] #a single value is fixed
+        configs += [collections.OrderedDict(zip(keys, x)) for x in itertools.product(*values)]
+    return collections.OrderedDict((config_name(class_name, kwargs), kwargs) for kwargs in configs)
+
+def config_name(class_name, kwargs):
+    """return the recognizer name of class `class_name` constructed with keyword arguments `kwargs`"""
+    return "%s(%s)" % (class_name, ", ".join("%s=%s" % (k, json.dumps(v)) for k, v in kwargs.iteritems()))
+
+def sweep_json(args, aggs, params, t, timings):
+    """return the contents of the sweep file, from the `score.Aggregate` of each configuration in `aggs`. the
+    configurations are ranked by frame accuracy, then by correct truth events"""
+    configs = []
+    for rz_name, agg in aggs.iteritems():
+        d = agg.to_json(args.bootstrap, args.bootstrap_seed)
+        frame_scores, event_scores = d["scores"]["frame_scores"], d["scores"]["event_scores"]
+        configs.append(dict(recognizer=rz_name, params=params[rz_name], acc=frame_scores.get("acc"),
+                            frame_scores=frame_scores, event_scores=event_scores, stats=d["stats"], cost=d["scores"].get("cost"),
+                            ci=d["scores"].get("ci")))
+    configs.sort(key=lambda x: (x["acc"] is not None, x["acc"], x["event_scores"]["t_counts"].get(score.CORRECT, 0)), reverse=True)
+    for rank, x in enumerate(configs):
+        x["rank"] = rank + 1
+    return dict(t=t, recognizer=args.recognizer, truths=args.truths, corpus=corpus_fingerprint(args.truths),
+                configs=configs, timings=timings.to_json())
+
+def scores_json(agg, rollup, summaries, recognizers, t, cases_dir, timings, resamples=0, seed=0):
+    """return the contents of the scores file, from the `score.Aggregate` and `score.Rollup` of the results and their
+    `summaries`, with the bootstrap confidence intervals of `resamples` seeded with `seed`, if given"""
+    scored = agg.to_json(resamples, seed)
+    scored["label_scores"] = [dict(recognizer=rz_name, label=label, **x.to_json())
+                              for (rz_name, label), x in rollup.rollup(("recognizer", "label")).iteritems()]
+    scored["rollup"] = rollup.to_json()
+    scored["results"] = summaries
+    scored["recognizers"] = recognizers
+    scored["t"] = t
+    scored["cases_dir"] = cases_dir
+    scored["timings"] = timings.to_json()
+    return scored
+
+def watch(args, rzs, pairs, cases_dir, timings):
+    """keep the recognizers `rzs` loaded and poll the ground truth files, their raw data and the recognizer sources.
+    when some change, re-score only the affected (truth file, recognizer) `pairs` and rewrite their case detail files
+    and the scores file in place. runs until interrupted"""
+    sf = os.path.join(args.outpath, SCORES_FILE)
+    inputs = dict((truth_file, case_inputs(truth_file)) for truth_file in args.truths)
+    sources = dict((rz_name, recognizer_source(rz)) for rz_name, rz in rzs.iteritems())
+    log.info("watching %d ground truth files and %d recognizers for changes..." % (len(inputs), len(sources)))
+    try:
+        while True:
+            time.sleep(args.poll)
+            stale = collections.defaultdict(set) #recognizers to re-score keyed on truth file
+            for truth_file in args.truths:
+                st = case_inputs(truth_file)
+                if st != inputs[truth_file]:
+                    inputs[truth_file] = st
+                    stale[truth_file].update(rzs)
+            for rz_name, rz in rzs.items():
+                st = recognizer_source(rz)
+                if st != sources[rz_name]:
+                    sources[rz_name] = st
+                    log.info("reloading %s..." % rz_name)
+                    try:
+                        rzs[rz_name] = reload_recognizer(rz_name, rz)
+                    except Exception:
+                        log.exception("failed to reload %s, keeping the loaded one" % rz_name)
+                        continue
+                    for truth_file in args.truths:
+                        stale[truth_file].add(rz_name)
+            if not stale:
+                continue
+
+            started = time.time()
+            for truth_file in args.truths: #in the order of the scores file
+                if truth_file not in stale:
+                    continue
+                try:
+                    results = evaluate(truth_file, dict((k, rzs[k]) for k in stale[truth_file]), args, timings)
+                except Exception:
+                    log.exception("failed to evaluate %s, keeping its previous scores" % truth_file)
+                    continue
+                for res in results:
+                    pair = pairs[truth_file, res["recognizer"]]
+                    pair[2] = write_case(res, args.outpath, pair[0], timings, args.timeline, atomic=True)
+                    pair[1], pair[3] = score.Aggregate(), score.Rollup()
+                    pair[1].add(res, args.bootstrap_block)
+                    pair[3].add(res)
+
+            agg, rollup = score.Aggregate(), score.Rollup()
+            recogs = collections.OrderedDict()
+            for (truth_file, rz_name), (detail, pair_agg, summary, pair_rollup) in pairs.iteritems():
+                agg.merge(pair_agg)
+                rollup.merge(pair_rollup)
+                recogs[rz_name] = True
+            scored = scores_json(agg, rollup, [pair[2] for pair in pairs.itervalues()], recogs.keys(),
+                                 datetime.datetime.now().isoformat(), cases_dir, timings, args.bootstrap, args.bootstrap_seed)
+            write_json(scored, sf, atomic=True)
+            log.info("re-scored %d cases in %.1fs, wrote %s" % (sum(len(v) for v in stale.itervalues()), time.time() - started, sf))
+    except KeyboardInterrupt:
+        log.info("stopped watching")
+
+def case_inputs(truth_file):
+    """return list of the path, size and mtime of ground truth file `truth_file` and its raw data files"""
+    files = [truth_file]
+    try:
+        head, tail = os.path.split(truth_file)
+        files += sorted(x for x in glob.glob(os.path.join(head, read_json(truth_file)["data_path"])) if not os.path.isdir(x))
+    except (IOError, ValueError, KeyError): #missing or being written, its stat still changes
+        pass
+    ret = []
+    for fn in files:
+        try:
+            st = os.stat(fn)
+        except OSError:
+            continue
+        ret.append((fn, st.st_size, st.st_mtime))
+    return ret
+
+def recognizer_source(rz):
+    """return the path, size and mtime of the source file of recognizer `rz`, or None if it has none"""
+    try:
+        fn = inspect.getsourcefile(type(rz))
+        st = os.stat(fn)
+    except (TypeError, OSError):
+        return None
+    return (fn, st.st_size, st.st_mtime)
+
+def reload_recognizer(rz_name, rz):
+    """reload the module of recognizer `rz` from its changed source, and return a new instance"""
+    reload(sys.modules[type(rz).__module__])
+    return init_recognizers([rz_name])[rz_name]
+
+def prune_snapshots(outpath, snapshots):
+    """remove the rotated scores files `snapshots` and their case detail files"""
+    for fn in snapshots:
+        nf = os.path.join(outpath, fn)
+        log.info("removing %s..." % nf)
+        try:
+            cases_dir = read_json(nf).get("cases_dir")
+            os.remove(nf)
+        except (IOError, OSError, ValueError):
+            continue
+        if cases_dir:
+            shutil.rmtree(os.path.join(outpath, cases_dir), ignore_errors=True)
+
+def corpus_fingerprint(truth_files):
+    """return digest of the contents of `truth_files` and the paths, sizes and mtimes of their raw data files"""
+    h = hashlib.sha1()
+    for truth_file in truth_files:
+        with open(truth_file, "rb") as f:
+            s = f.read()
+        h.update("%s\0%s\0" % (truth_file, s))
+        head, tail = os.path.split(truth_file)
+        for data_file in sorted(glob.glob(os.path.join(head, json.loads(s)["data_path"]))):
+            if not os.path.isdir(data_file):
+                st = os.stat(data_file)
+                h.update("%s\0%d\0%r\0" % (data_file, st.st_size, st.st_mtime))
+    return h.hexdigest()
+
+def case_file(cases_dir, n, res):
+    """return path of the detail file of the `n`th result `res` of a run"""
+    name = re.sub(r"\W", "_", "%s__to__%s" % (res["labels_file"], res["recognizer"]))
+    return os.path.join(cases_dir, "%04d-%s.json" % (n, name))
+
+def case_summary(res, detail):
+    """return the headline numbers of scored result `res`, whose full result is written to `detail`"""
+    d = dict((k, v) for k, v in res.iteritems() if k not in DETAIL_KEYS)
+    events = res["scores"]["events"]
+    d["scores"] = dict(frame_score=res["scores"]["frame_score"], events=dict((k, v) for k, v in events.iteritems() if k not in ("truths", "detected")))
+    if "cost" in res["scores"]:
+        d["scores"]["cost"] = res["scores"]["cost"]
+    d["stats"] = dict(truth_count=len(res["labels"]), detected_count=len(res["detected"]), segment_count=len(res["scores"]["segments"]))
+    if res["labels"]:
+        d["label_span"] = [res["labels"][0]["t1"], res["labels"][-1]["t2"]]
+    d["detail"] = detail
+    return d
 
-import sys
+def evaluate(truth_file, rzs, args, timings=None, params=None):
+    """feed the raw data of ground truth file `truth_file` to the recognizers `rzs` and return the list of scored results.
+    the time spent in each stage is added to `timings`. `params` holds the constructor arguments of the recognizers
+    constructed with any, keyed on name, to cache their results apart"""
+    results = []
+    timings = timings or timing.Timings()
+
+    log.info("processing %s..." % truth_file)
+    d = read_json(truth_file) #read the ground truth files
+
+    head, tail = os.path.split(truth_file)
+    data_path =  os.path.join(head, d["data_path"])
+
+    sample_intervals = ingest.SampleIntervals(MAX_SAMPLE_RATE, args.sample_rates)
+
+    data_files = [x for x in glob.glob(data_path) if not os.path.isdir(x)] #skips packed data matched by the glob
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_size * 2**20)
+    keys, cached = {}, {}
+    if cache:
+        for rz_name, rz in rzs.iteritems():
+            keys[rz_name] = cache.key(rz, data_files, (params or {}).get(rz_name), feed_mode(args))
+            entry = cache.get(keys[rz_name])
+            if entry is not None:
+                log.info("using cached results of %s..." % rz_name)
+                cached[rz_name] = entry
+    live = dict((k, v) for k, v in rzs.iteritems() if k not in cached) #recognizers to feed the raw data
+
+    threads = ThreadPool(args.rz_threads) if args.rz_threads > 1 else None
+    costs = dict((k, timing.CostMeter()) for k in live)
+    types = dict((k, record_types(rz)) for k, rz in live.iteritems())
+
+    span = None #times of first and last record
+    if not live and not args.debug:
+        if cached:
+            span = cached.values()[0]["span"]
+        data_files = []
+
+    windows = Windows(args.window) if args.window and live else None
+    scorers = {} #`score.StreamScorer` keyed on recognizer, when scoring windows incrementally
+    case_first = window_start = None
+
+    if args.merge and len(data_files) > 1:
+        log.info("merging the data of %s in time order..." % ", ".join(data_files))
+        streams = [pack.timed_records(x) if pack.is_packed(x) else ingest.timed_records(x) for x in data_files]
+        batches = ingest.merge_batches(streams, args.batch_size or MERGE_BATCH_SIZE, data_files)
+        sources = [(data_path, timings.iterate(batches, "decode", data_path))]
+    else:
+        sources = ((x, read_batches(x, args, timings)) for x in data_files)
+    if args.prefetch:
+        sources = prefetch_sources(sources, args.prefetch)
+
+    ends = [] #times of the first and last record of each source
+    try:
+        for data_file, batches in sources:
+            first = None
+            for batch in batches:
+                for recs, end in windows.split(batch) if windows else [(batch, None)]:
+                    if recs:
+                        if first is None:
+                            first = recs[0]["time"]
+                        last = recs[-1]["time"]
+                        if case_first is None:
+                            case_first = first
+                        window_start = window_start or score.to_epoch(parse_date(first))
+
+                        feed(live, recs, threads, timings, costs, types) #feed raw data to each of the recognizers
+
+                    if args.debug:
+                        for rec in recs:
+                            sample_intervals.add(rec["type"], parse_date(rec["time"]))
+
+                    if end is not None:
+                        for rz_name, rz in live.iteritems():
+                            if rz_name not in scorers:
+                                scorers[rz_name] = score.StreamScorer(supported_labels(rz, d["labels"]), case_first)
+                            score_window(rz_name, rz, scorers[rz_name], (window_start, end), timings, costs[rz_name])
+                        window_start = end
+
+            if first is not None:
+                ends += [first, last]
+    finally: #the recognizer threads are done, even if feeding failed
+        if threads:
+            threads.close()
+            threads.join()
+
+    if ends: #across all data files, whatever their order
+        epoch = lambda x: score.to_epoch(parse_date(x))
+        span = (case_first if windows else min(ends, key=epoch), max(ends, key=epoch))
+
+    span_secs = 0
+    if span:
+        d["t1"], d["t2"] = span
+        span_secs = abs((parse_date(span[1]) - parse_date(span[0])).total_seconds())
+
+    if args.debug:
+        d["sample_intervals"] = sample_intervals.to_json()
+
+    for rz_name, rz in rzs.iteritems():        
+        log.info("evaluating recognizer %s for labels %s..." % (rz, rz.labels_supported()))
+        res = d.copy()
+        streamed = windows and span and rz_name in live
+        if rz_name in cached:
+            res["detected"] = unscored(cached[rz_name]["detected"]) #also of entries cached with their scores
+        elif streamed:
+            scorer = scorers.get(rz_name) or score.StreamScorer(supported_labels(rz, d["labels"]), span[0])
+            score_window(rz_name, rz, scorer, (window_start, max(windows.latest, window_start)), timings, costs[rz_name], last=True)
+            res["detected"] = [x.item for x in scorer.detected]
+        else:
+            with timings.stage("get_results", rz_name) as st:
+                res["detected"] = costs[rz_name].get_results(rz)
+                st.count += len(res["detected"])
+        if streamed:
+            res["labels"] = scorer.labels
+            with timings.stage("score", rz_name) as st:
+                res["scores"] = scorer.finish(span[1])
+                st.count += len(res["scores"]["segments"])
+        else:
+            res["labels"] = supported_labels(rz, res["labels"])
+            with timings.stage("score", rz_name) as st:
+                res["scores"] = score.score_results(res)
+                st.count += len(res["scores"]["segments"])
+        if rz_name in costs:
+            res["scores"]["cost"] = costs[rz_name].to_json(span_secs)
+        elif "cost" in cached[rz_name]: #as measured when the results were cached
+            res["scores"]["cost"] = cached[rz_name]["cost"]
+        if cache and rz_name in live:
+            cache.put(keys[rz_name], dict(detected=unscored(res["detected"]), span=span, cost=res["scores"]["cost"]))
+        res["recognizer"] = rz_name
+        res["labels_file"] = truth_file
+        results.append(res)
+
+        rz.reset()
+
+    if cache:
+        cache.evict()
+
+    return results
+
+def feed_mode(args):
+    """return the options of how the raw data is fed that change the results of the recognizers, to cache them apart:
+    with --merge, the records of the data files arrive interleaved in time order instead of file by file, and with
+    --window, `get_results(time_range)` of each window is scored instead of the results of the whole case"""
+    mode = {}
+    if args.merge:
+        mode["merge"] = True
+    if args.window:
+        mode["window"] = args.window
+    return mode
+
+def unscored(items):
+    """return copies of the detected `items` without the event scores that scoring sets on them, so the results of a
+    recognizer are cached as it returned them and scored afresh against the labels of each run"""
+    return [dict((k, v) for k, v in x.iteritems() if k != "event_score") for x in items]
+
+def read_batches(data_file, args, timings):
+    """return the batches of records of `data_file` to feed the recognizers: the whole file in one batch, or
+    batches of `args.batch_size` decoded incrementally. packed data files are read from their packed form"""
+    if pack.is_packed(data_file):
+        log.info("reading packed data of %s..." % data_file)
+        return pack.read_packed(data_file, args.batch_size)
+    log.info("reading data from %s..." % data_file)
+    if args.batch_size:
+        return timings.iterate(ingest.iter_batches(data_file, args.batch_size), "decode", data_file)
+    with timings.stage("read", data_file):
+        chunk = ingest.read_data(data_file)
+    with timings.stage("decode", data_file) as st:
+        batches = [ingest.decode_records(chunk, data_file)]
+        st.count += len(batches[0])
+    return batches
+
+def prefetch_sources(sources, depth):
+    """return the (data file, batches) `sources` with their batches read and decoded ahead, up to `depth` batches
+    across files, in a background thread. files and batches keep their order"""
+    batches = ingest.prefetch(((data_file, batch) for data_file, batches in sources for batch in batches), depth)
+    return ((data_file, (batch for f, batch in group)) for data_file, group in itertools.groupby(batches, key=operator.itemgetter(0)))
+
+def supported_labels(rz, labels):
+    """return the `labels` items of the labels supported by recognizer `rz`"""
+    return [x for x in labels if x["label"] in rz.labels_supported()]
+
+def score_window(rz_name, rz, scorer, (t1, t2), timings, cost, last=False):
+    """get the results of recognizer `rz` for the window from `t1` to `t2` (epoch microseconds) and add them to its
+    `score.StreamScorer`, logging the partial scores so far. the `last` window takes all the remaining results"""
+    with timings.stage("get_results", rz_name) as st:
+        items = cost.get_results(rz, (score.from_epoch(t1), score.from_epoch(t2)))
+        st.count += len(items)
+    with timings.stage("score", rz_name):
+        scorer.add(items, float("inf") if last else t2)
+    p = scorer.partial()
+    if p["t"] is not None:
+        log.info("partial scores of %s up to %s: frame acc %s, %d truth and %d detected events" % (rz_name,
+                 score.from_epoch(p["t"]).isoformat(), "%.3f" % p["frame_score"]["acc"] if "acc" in p["frame_score"] else "-",
+                 sum(p["events"]["t_counts"].values()), sum(p["events"]["d_counts"].values())))
+
+class Windows(object):
+    """splits the batches of raw data records at the ends of consecutive time windows of `width` seconds.
+    the windows follow the latest record time so far, so records out of time order stay in the current window"""
+
+    def __init__(self, width):
+        self.width = int(width * 10**6)
+        self.end = self.latest = None #epoch microseconds
+
+    def split(self, recs):
+        """return list of (records, end) for the parts of batch `recs`, with the end of the window each part closes, or None"""
+        if isinstance(recs, pack.PackedRecords):
+            times = recs.times().tolist()
+        else:
+            times = [score.to_epoch(parse_date(rec["time"])) for rec in recs]
+        parts = []
+        i = 0
+        for j, t in enumerate(times):
+            self.latest = max(self.latest, t)
+            if self.end is None:
+                self.end = t + self.width
+            elif t >= self.end:
+                parts.append((recs[i:j], self.end))
+                i = j
+                self.end += self.width * ((t - self.end) // self.width + 1)
+        parts.append((recs[i:], None))
+        return parts
+
+def record_types(rz):
+    """return the record types recognizer `rz` subscribes to, or None for all records"""
+    get_types = getattr(rz, "record_types", None) #recognizers predating `AbstractRecognizer.record_types`
+    return get_types() if get_types else None
+
+def partition_records(recs, types):
+    """return the records of `recs` for each recognizer, from the record types (or None for all) keyed on recognizer
+    in `types`. the records are partitioned by type in one pass, and recognizers subscribing to the same types share
+    a list of those records in their original order. packed records are selected by their type column"""
+    subscribed = set(frozenset(x) for x in types.itervalues() if x is not None)
+    if isinstance(recs, pack.PackedRecords):
+        parts = dict((s, recs.select(s)) for s in subscribed)
+    else:
+        parts = dict((s, []) for s in subscribed)
+        dests = {} #lists to append to keyed on record type
+        for rec in recs:
+            rec_type = rec.get("type")
+            to = dests.get(rec_type)
+            if to is None:
+                to = dests[rec_type] = [parts[s] for s in subscribed if rec_type in s]
+            for part in to:
+                part.append(rec)
+    return dict((k, recs if x is None else parts[frozenset(x)]) for k, x in types.iteritems())
+
+def feed(rzs, recs, threads=None, timings=None, costs=None, types=None):
+    """feed the raw data records `recs` to each of the recognizers `rzs`, concurrently if given a pool of `threads`.
+    the recognizers all read the same `recs` in memory, and this returns when every recognizer has processed them.
+    with record `types` keyed on recognizer, each one only gets the records of its types (see `partition_records`).
+    the calls are timed in `timings`, and measured by the `timing.CostMeter` of each recognizer in `costs`"""
+    timings = timings or timing.Timings()
+    parts = partition_records(recs, types) if types and any(x is not None for x in types.itervalues()) else None
+    def process((rz_name, rz)):
+        rz_recs = parts[rz_name] if parts else recs
+        with timings.stage("process", rz_name) as st:
+            if costs:
+                costs[rz_name].process(rz, rz_recs)
+            else:
+                rz.process(rz_recs)
+            st.count += len(rz_recs)
+
+    if threads:
+        threads.map(process, rzs.items(), chunksize=1)
+    else:
+        for item in rzs.items():
+            process(item)
+
+worker_rzs = worker_params = None
+
+def init_worker(names, params=None):
+    """initialize a pool worker process with its own recognizers"""
+    global worker_rzs, worker_params
+    init_logging()
+    worker_rzs = init_recognizers(names, params)
+    worker_params = params
+
+def evaluate_worker((truth_file, args)):
+    """evaluate `truth_file` in a pool worker, return its results and timings"""
+    timings = timing.Timings()
+    return evaluate(truth_file, worker_rzs, args, timings, worker_params), timings
 
-def init_recognizers(rzs):
+def init_recognizers(rzs, params=None):
+    """return the recognizers named `rzs` keyed on name. `params` holds the constructor keyword arguments of the
+    recognizers named by `config_name`, keyed on name"""
     d = dict() #import user-defined recognizers
     for rz_name in rzs:
-        p = rz_name.rsplit(".", 1)
+        kwargs = params.get(rz_name) if params else None
+        p = (rz_name if kwargs is None else rz_name.split("(", 1)[0]).rsplit(".", 1)
         if not len(p) == 2:
             raise ValueError("recognizers must be specified by [<path>/]<module_name>.<class_name>")
         b, class_name = p[0], p[1]
@@ -172,7 +937,7 @@ def init_recognizers(rzs):
             sys.path.append(path)
 
         module = import_name(module_name)
-        d[rz_name] = getattr(module, class_name)() #init the recognizer
+        d[rz_name] = getattr(module, class_name)(**(kwargs or {})) #init the recognizer
     return d
 
 
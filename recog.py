@@ -20,6 +20,20 @@ class AbstractRecognizer( object ):
         """
         raise NotImplementedError()
 
+    def record_types(self):
+        """returns a list of the raw data record types this recognizer processes, or None (the default) for all records.
+        `process` is then only given the records of these types, in their original order, and the framework can skip
+        the types no recognizer processes (packed data of those types is never read).
+        """
+        return None
+
+    def cache_key(self):
+        """returns a string identifying any input of the results besides the recognizer's module source, its
+        constructor arguments and the raw data, e.g. a digest of a model file it loads, or None (the default).
+        results are cached apart for each value, so a changed input is not scored from stale cached results.
+        """
+        return None
+
     def labels_supported(self):
         """returns a list of labels that this recognizer supports (generates). 
         This is used by the framework to determine how to score the recognizers given some arbitrary labeled ground truth data.
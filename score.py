@@ -2,12 +2,15 @@
             
 from optparse import OptionParser
 import datetime, glob, os, sys, itertools
+import bisect, heapq
 from itertools import islice
+from operator import itemgetter
 
 import json, pprint
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
-from iso8601.iso8601 import parse_date
+import numpy as np
+from iso8601.iso8601 import parse_date, UTC
 
 def score_results(results):
     """Score list of detected events to list of ground truth items (from test_cases.py). 
@@ -15,77 +18,202 @@ def score_results(results):
 
     returns dict containing:
 
-    segments - ordered list of scored segments. segment is dict with t1, t2, score, and optional err
+    segments - ordered, scored `Segments`. each segment has t1, t2, score, and optional err
     """
-    truth_time = 0
-    truths = results["labels"]
-    detected = results["detected"]
+    truths = spans(results["labels"])
+    detected = spans(results["detected"])
+    case = Span(results)
 
-    for truth in truths:
-        truth_time += (parse_date(truth["t2"]) - parse_date(truth["t1"])).seconds
-
-    overlapped = False
-    overlaps = defaultdict(list) #list of state index that overlap truth keyed on truth index
-
-    segs = extract_segments(results)
+    segs = extract_segments(truths + detected, case)
     segs = score_segments(segs, truths, detected)
 
     return dict(segments=segs,
                 frame_score=score_frames(segs),
                 events=score_events(truths, detected, segs))
-               
-def extract_segments(results):
-    """extract the time segments from labels and detected """
-    tt = [ ( parse_date(x["t1"]), parse_date(x["t2"]) ) for x in results["labels"]+results["detected"] ]
-    ts = sorted(itertools.chain.from_iterable( tt ))
-    t1 = parse_date(results["t1"])
-    if t1 < ts[0]:
-        ts.insert(0, t1)
-    t2 = parse_date(results["t2"])
-    if t2 > ts[-1]:
-        ts.append(t2)
-    return [ dict(t1=x[0].isoformat(), t2=x[1].isoformat()) for x in list(sliding_window(ts, 2)) ]
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=UTC)
+
+def to_epoch(dt):
+    """return aware datetime `dt` as integer microseconds since the unix epoch"""
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+def from_epoch(t):
+    """return integer microseconds since the unix epoch `t` as an aware (UTC) datetime"""
+    return EPOCH + datetime.timedelta(microseconds=t)
+
+class Span(object):
+    """time interval of a label or detection `item`, with its t1 and t2 parsed once, when the case is loaded.
+    `t1` and `t2` are epoch microseconds, `dt1` and `dt2` the parsed datetimes (kept for formatting)
+    """
+    __slots__ = ("t1", "t2", "dt1", "dt2", "item")
+
+    def __init__(self, item):
+        self.item = item
+        self.dt1, self.dt2 = parse_date(item["t1"]), parse_date(item["t2"])
+        self.t1, self.t2 = to_epoch(self.dt1), to_epoch(self.dt2)
+
+def spans(items):
+    """return list of `Span` for the list of time interval dicts `items`"""
+    return [Span(x) for x in items]
+
+def overlaps(a, b):
+    """return True if spans (or segments) `a` and `b` overlap, same as `time_overlap` on epoch times"""
+    return (a.t1 != b.t2) and (b.t1 != a.t2) and (a.t1 <= b.t2) and (b.t1 <= a.t2)
+
+SCORES = ("TP", "TN", "FP", "FN")
+ERRORS = (None, "D", "I", "F", "M", "Us", "Ue", "Os", "Oe")
+FRAME_CLASSES = ("D", "I", "F", "M", "Us", "Ue", "Os", "Oe", "TP", "TN")
+POS_CLASSES = ("D", "F", "Us", "Ue", "TP") #frame classes of positive frames
+NEG_CLASSES = ("I", "M", "Os", "Oe", "TN") #and of negative frames
+
+NO_CLASS = len(FRAME_CLASSES) #FP and FN segments without an error class
+SCORE_CLASS = np.array([FRAME_CLASSES.index("TP"), FRAME_CLASSES.index("TN"), NO_CLASS, NO_CLASS]) #keyed on score code
+ERROR_CLASS = np.array([NO_CLASS] + [FRAME_CLASSES.index(e) for e in ERRORS[1:]]) #keyed on err code
+
+class Segments(object):
+    """ordered, contiguous time segments in columnar form.
+    segment `i` spans boundaries `times[i]` to `times[i+1]` (int64 epoch microseconds), `dates` holds the boundary datetimes,
+    `score` and `err` are int8 arrays of indexes into `SCORES` and `ERRORS` (-1 while unscored),
+    and `label`, `match` are lists with one entry per segment once labeled.
+    ISO strings are only produced by `to_json`, when the scores are written.
+    """
+    __slots__ = ("times", "dates", "score", "err", "label", "match")
+
+    def __init__(self, bounds):
+        self.times = np.array([t for t, dt in bounds], dtype=np.int64)
+        self.dates = [dt for t, dt in bounds]
+        n = max(len(bounds) - 1, 0)
+        self.score = np.empty(n, dtype=np.int8)
+        self.score.fill(-1)
+        self.err = np.zeros(n, dtype=np.int8)
+        self.label = self.match = None
+
+    def __len__(self):
+        return len(self.score)
+
+    def __getitem__(self, i):
+        return Segment(self, i)
+
+    def __iter__(self):
+        return (Segment(self, i) for i in xrange(len(self)))
+
+    def durations(self):
+        """return array of segment durations in seconds"""
+        return np.diff(self.times) / 1e6
+
+    def frame_classes(self):
+        """return array of the index in `FRAME_CLASSES` of each segment, `NO_CLASS` if it counts in none"""
+        classes = SCORE_CLASS[self.score]
+        errs = self.err > 0
+        classes[errs] = ERROR_CLASS[self.err[errs]]
+        return classes
+
+    def to_json(self):
+        """return list of segment dicts, as written to the scores"""
+        return [seg.to_json() for seg in self]
+
+class Segment(object):
+    """view of segment `i` of `Segments`"""
+    __slots__ = ("segs", "i")
+
+    def __init__(self, segs, i):
+        self.segs, self.i = segs, i
+
+    t1 = property(lambda self: self.segs.times[self.i])
+    t2 = property(lambda self: self.segs.times[self.i+1])
+    score = property(lambda self: SCORES[self.segs.score[self.i]] if self.segs.score[self.i] >= 0 else None)
+    err = property(lambda self: ERRORS[self.segs.err[self.i]])
+
+    def to_json(self):
+        segs, i = self.segs, self.i
+        d = dict(t1=segs.dates[i].isoformat(), t2=segs.dates[i+1].isoformat())
+        if segs.label and segs.label[i] is not None:
+            d["label"] = segs.label[i]
+            if segs.match[i] is not None:
+                d["match"] = segs.match[i]
+        if self.score is not None:
+            d["score"] = self.score
+        if self.err:
+            d["err"] = self.err
+        return d
+
+def extract_segments(items, case):
+    """extract the time segments from the spans of labels and detected, `items`, over the `case` span"""
+    ts = sorted(itertools.chain.from_iterable( ((x.t1, x.dt1), (x.t2, x.dt2)) for x in items ), key=itemgetter(0))
+    if case.t1 < ts[0][0]:
+        ts.insert(0, (case.t1, case.dt1))
+    if case.t2 > ts[-1][0]:
+        ts.append((case.t2, case.dt2))
+    return Segments(ts)
 
 def label_segments(segs, truths, detected):
     """for each segment, attach `label` from `truth` and `match=True` when truth detected label matches truth, else False if match fails"""
-    for seg in segs:
-        for truth in truths:
-            if time_overlap(seg, truth):            
-                seg["label"] = truth["label"]
-                for det in detected:
-                    if time_overlap(seg, det):
-                        if det["label"] == truth["label"]:
-                            seg["match"] = True
-                        else:
-                            seg["match"] = False
+    truth_idx = overlap_index(segs, truths)
+    det_idx = overlap_index(segs, detected)
+    segs.label = [None] * len(segs)
+    segs.match = [None] * len(segs)
+    for i, (ti, di) in enumerate(itertools.izip(truth_idx, det_idx)):
+        if ti >= 0:
+            segs.label[i] = truths[ti].item["label"]
+            if di >= 0:
+                segs.match[i] = detected[di].item["label"] == truths[ti].item["label"]
     return segs
 
+def new_frame_counts():
+    return dict(D=0, I=0, F=0, M=0, Us=0, Ue=0, Os=0, Oe=0, TP=0, TN=0)
+
+def count_frames(durations, classes):
+    """sum the segment `durations` (seconds) of each frame class, `classes` as from `Segments.frame_classes`"""
+    secs = np.bincount(classes, weights=durations, minlength=NO_CLASS+1)
+    hits = np.bincount(classes, minlength=NO_CLASS+1)
+    return frame_counts(secs, hits)
+
+class Coverage(object):
+    """time covered by each category of the segments bounded by `times` (epoch microseconds), `codes` being the
+    category (0 to `k`-1) of each segment. `cum` holds the time covered by each category up to each bound"""
+
+    def __init__(self, times, codes, k):
+        self.times, self.codes = times, codes
+        onehot = np.zeros((len(codes), k), dtype=np.int64)
+        onehot[np.arange(len(codes)), codes] = np.diff(times)
+        self.cum = np.zeros((len(codes) + 1, k), dtype=np.int64)
+        np.cumsum(onehot, axis=0, out=self.cum[1:])
+
+    def durations(self, edges):
+        """return array of the time covered by each category (columns) in each bucket between `edges` (rows)"""
+        e = np.clip(edges, self.times[0], self.times[-1])
+        i = np.clip(np.searchsorted(self.times, e, side="right") - 1, 0, len(self.codes) - 1)
+        at = self.cum[i] #up to the start of the segment each edge is in, plus its part of that segment
+        at[np.arange(len(e)), self.codes[i]] += e - self.times[i]
+        return np.diff(at, axis=0)
+
+def frame_counts(secs, hits):
+    """return frame counts dict from the seconds and number of segments of each frame class"""
+    d = new_frame_counts()
+    for i, k in enumerate(FRAME_CLASSES):
+        if hits[i]:
+            d[k] = float(secs[i])
+    return d
+
 def score_frames(segs):
     """score the frame errors from the segments"""
-    d = dict(D=0, I=0, F=0, M=0, Us=0, Ue=0, Os=0, Oe=0, TP=0, TN=0)
-    for seg in segs:
-        secs = (parse_date(seg["t2"]) - parse_date(seg["t1"])).total_seconds()
-        if seg["score"] == "FP" or seg["score"] == "FN":
-            if seg.get("err"):
-                d[seg["err"]] += secs
-        elif seg["score"] == "TP" or seg["score"] == "TN":
-            d[seg["score"]] += secs
+    return frame_rates(count_frames(segs.durations(), segs.frame_classes()))
 
+def frame_rates(d):
+    """calculate the frame rates from the frame counts `d`"""
     d["P"] = d["D"] + d["F"] + d["Us"] + d["Ue"] + d["TP"] #positive frames
     d["N"] = d["I"] + d["M"] + d["Os"] + d["Oe"] + d["TN"] #negative frames
 
     #calculate frame ratessiter
     ret = dict(p_rates={}, n_rates={}, frame_counts=d)
 
-    POS = ["D", "F", "Us", "Ue", "TP"]
-    NEG = ["I", "M", "Os", "Oe", "TN"]
-
     if d["P"]:
-        for i in POS:
+        for i in POS_CLASSES:
             ret["p_rates"][i+"r"] = d[i]*1.0 / d["P"]
 
     if d["N"]:
-        for i in NEG:
+        for i in NEG_CLASSES:
             ret["n_rates"][i+"r"] = d[i]*1.0 / d["N"]
     if d["P"] or d["N"]:   
         ret["acc"] = (d["TP"]*1.0 + d["TN"]) / (d["P"]*1.0 + d["N"]) 
@@ -95,74 +223,88 @@ def score_frames(segs):
 
 def score_segments(segs, truths, detected):        
     """score the segments extracted from truths and detected lists"""
-    matches = 0
-    for seg in segs:
-        truth_match = detected_match = False
-        for truth in truths:
-            if time_overlap(seg, truth):
-                truth_match = True
-        for det in detected:
-            if time_overlap(seg, det):
-                detected_match = True
+    scores = basic_scores(segs, truths, detected)
+    errs = segment_errors(scores)
+
+    segs.score = np.array([SCORES.index(x) for x in scores], dtype=np.int8)
+    segs.err = np.array([ERRORS.index(x) for x in errs], dtype=np.int8)
+    return segs
+
+def basic_scores(segs, truths, detected):
+    """return list of the basic score (TP|TN|FP|FN) of each of the `Segments`, from the truths and detected overlapping it"""
+    truth_idx = overlap_index(segs, truths)
+    det_idx = overlap_index(segs, detected)
+    scores = []
+    for ti, di in itertools.izip(truth_idx, det_idx):
+        truth_match = ti >= 0
+        detected_match = di >= 0
 
         #assign basic score to segment (TP|TN|FP|FN)
         if truth_match:
             if detected_match:
-                seg["score"] = "TP"
+                scores.append("TP")
             else:
-                seg["score"] = "FN"
+                scores.append("FN")
         else:
             if detected_match:
-                seg["score"] = "FP"
+                scores.append("FP")
             else:
-                seg["score"] = "TN"
+                scores.append("TN")
+    return scores
 
+def segment_errors(scores, lo=0, hi=None, first=True, last=True):
+    """return list of the error classes of the segments with `scores[lo:hi]`, from the scores of their neighbours.
+    `first` and `last` tell if `scores[0]` and `scores[-1]` are the first and last segments of the case,
+    so the error classes of a run of segments can be assigned before the rest of the case is scored.
+    """
     # assign error class to all FN and FP. fig 3, ward et al 2011
+    hi = len(scores) if hi is None else hi
+    errs = [None] * (hi - lo)
     prev_score = next_score = None
-    for i in range(len(segs)):
-        score = segs[i]["score"]
+    for i in range(lo, hi):
+        score = scores[i]
         if score == "TP" or score == "TN":
             continue 
 
-        if i < len(segs)-1:
-            next_score = segs[i+1]["score"]
+        if i < len(scores)-1:
+            next_score = scores[i+1]
 
         if i > 0:
-            prev_score = segs[i-1]["score"]
+            prev_score = scores[i-1]
 
-        if i == 0: #beginning of sequence
+        if i == 0 and first: #beginning of sequence
 
             if score == "FP":
                 if next_score is None or next_score == "TN" or next_score == "FN":
-                    segs[i]["err"] = "I"
+                    errs[i-lo] = "I"
                 elif next_score == "TP":
-                    segs[i]["err"] = "Os"
+                    errs[i-lo] = "Os"
                 else:
                     warn("Unhandled error case: %s followed by %s" % (score, next_score))
 
             elif score == "FN":
                 if next_score is None or next_score == "TN" or next_score == "FP":
-                    segs[i]["err"] = "D"
+                    errs[i-lo] = "D"
                 elif next_score == "TP":
-                    segs[i]["err"] = "Us"
+                    errs[i-lo] = "Us"
                 else:
                     warn("Unhandled error case: %s followed by %s" % (score, next_score))
 
-        elif i == len(segs) - 1: #end of sequence
+        elif i == len(scores) - 1 and last: #end of sequence
 
             if score == "FP":
                 if prev_score == "TN" or prev_score == "FN":
-                    segs[i]["err"] = "I"
+                    errs[i-lo] = "I"
                 elif prev_score == "TP":
-                    segs[i]["err"] = "Oe"
+                    errs[i-lo] = "Oe"
                 else:
                     warn("Unhandled error case: %s followed by %s" % (score, next_score))
                     
             elif score == "FN":
                 if prev_score == None or prev_score == "TN" or prev_score == "FP":
-                    segs[i]["err"] = "D"
+                    errs[i-lo] = "D"
                 elif prev_score == "TP":
-                    segs[i]["err"] = "Ue"
+                    errs[i-lo] = "Ue"
                 else:
                     warn("Unhandled error case: %s followed by %s" % (score, next_score))
 
@@ -171,17 +313,17 @@ def score_segments(segs, truths, detected):
             if score == "FP":
                 if next_score == "TP":
                     if prev_score == "TP":
-                        segs[i]["err"] = "M"
+                        errs[i-lo] = "M"
                     elif prev_score == "TN" or prev_score == "FN":
-                        segs[i]["err"] = "Os"
+                        errs[i-lo] = "Os"
                     else:
                         warn("Unhandled error case: %s %s %s" % (prev_score, score, next_score))
 
                 elif next_score == "TN" or next_score == "FN":
                     if prev_score == "TN" or prev_score == "FN":
-                        segs[i]["err"] = "I"
+                        errs[i-lo] = "I"
                     elif prev_score == "TP":
-                        segs[i]["err"] = "Oe"
+                        errs[i-lo] = "Oe"
                     else:
                         warn("Unhandled error case: %s %s %s" % (prev_score, score, next_score))
                 else:
@@ -191,24 +333,24 @@ def score_segments(segs, truths, detected):
 
                 if next_score == "TP":
                     if prev_score == "TP":
-                        segs[i]["err"] = "F"
+                        errs[i-lo] = "F"
                     elif prev_score == "TN" or prev_score == "FP":
-                        segs[i]["err"] = "Us"
+                        errs[i-lo] = "Us"
                     else:
                         warn("Unhandled error case: %s %s %s" % (prev_score, score, next_score))
 
                 elif next_score == "TN" or next_score == "FP":
                     if prev_score == "TN" or prev_score == "FP":
-                        segs[i]["err"] = "D"
+                        errs[i-lo] = "D"
                     elif prev_score == "TP":
-                        segs[i]["err"] = "Ue"
+                        errs[i-lo] = "Ue"
                     else:
                         warn("Unhandled error case: %s %s %s" % (prev_score, score, next_score))
 
             else:
                 raise warn("Unknown score: %s" % score)
 
-    return segs
+    return errs
 
 # Event types for Actual Events (ground truth) and Returned Events (detected)
 EVENT_DELETION = "D"
@@ -223,46 +365,63 @@ FRAGMENTING_AND_MERGING = "FM'"
 
 CORRECT = "C"
 
+TRUTH_EVENTS = (CORRECT, EVENT_DELETION, FRAGMENTED_EVENT, FRAGMENTED_AND_MERGED, MERGED_EVENT)
+DETECTED_EVENTS = (CORRECT, FRAGMENTING_RETURN, MERGING_RETURN, FRAGMENTING_AND_MERGING, INSERTION_RETURN)
+
+SEGMENT_EVENTS = {"D":EVENT_DELETION, "F":FRAGMENTED_EVENT, "I":INSERTION_RETURN, "M":MERGING_RETURN} #keyed on segment err
+SEGMENT_EVENT_ERRS = [ERRORS.index(e) for e in SEGMENT_EVENTS]
+
 def score_events(truths, detected, segs):
-    """score truth and detected events.
+    """score truth and detected events from their spans and the scored `Segments`.
     returns dict of truth, detected, and stats
     """
+    assign_events(truths, detected, segs)
+    return count_events([x.item for x in truths], [x.item for x in detected])
+
+def assign_events(truths, detected, segs):
+    """set the `event_score` of the truth and detected items from their spans and the scored `Segments`"""
+    #1st pass, so-called 'trivial' assignments from segments: each item gets the event score of the error class
+    #of the last overlapping segment with one of the classes in `SEGMENT_EVENTS`
+    items = truths+detected
+    rel = np.where(np.in1d(segs.err, SEGMENT_EVENT_ERRS), np.arange(len(segs)), -1)
+    last_rel = np.maximum.accumulate(rel) if len(rel) else rel #last segment up to each index with such an error class
+    los, his = segment_runs(segs, items)
+    for span, lo, hi in itertools.izip(items, los.tolist(), his.tolist()):
+        if lo < hi and last_rel[hi-1] >= lo:
+            span.item["event_score"] = SEGMENT_EVENTS[ERRORS[segs.err[last_rel[hi-1]]]]
+
+    #2nd pass, overlaps between scored events. For a truth overlapped by merging returns, the first one turns
+    #a fragmented event into fragmented and merged, and any further one (or the first, for other events) into merged.
+    #A detection overlapping a fragmented event becomes a fragmenting return, unless it is a merging return itself,
+    #or a merging return earlier in the list of detections already turned that event into a merged one.
+    pairs = overlap_pairs(detected, truths)
+    t_scores = [x.item.get("event_score") for x in truths]
+    merging = [x.item.get("event_score") == MERGING_RETURN for x in detected]
+    n_merging = [0] * len(truths)
+    first_merging = [len(detected)] * len(truths)
+    for i, j in pairs:
+        if merging[i]:
+            n_merging[j] += 1
+            first_merging[j] = min(first_merging[j], i)
+
+    for i, j in pairs:
+        if not merging[i] and t_scores[j] == FRAGMENTED_EVENT and first_merging[j] > i:
+            detected[i].item["event_score"] = FRAGMENTING_RETURN
+
+    for j, t in enumerate(truths):
+        if n_merging[j]:
+            if t_scores[j] == FRAGMENTED_EVENT and n_merging[j] == 1:
+                t.item["event_score"] = FRAGMENTED_AND_MERGED
+            else:
+                t.item["event_score"] = MERGED_EVENT
 
-    #1st pass, so-called 'trivial' assignments from segments
-    for d in truths+detected:
-        for seg in segs:
-            if time_overlap(d, seg):
-                if seg.get("err") == "D":
-                    d["event_score"] = EVENT_DELETION
-                elif seg.get("err") == "F":
-                    d["event_score"] = FRAGMENTED_EVENT
-                elif seg.get("err") == "I":
-                    d["event_score"] = INSERTION_RETURN
-                elif seg.get("err") == "M":                    
-                    d["event_score"] = MERGING_RETURN
-
-    #2nd pass, overlaps between scored events
-    for d in detected:
-        for t in truths:
-            if time_overlap(d, t):
-                if d.get("event_score") == MERGING_RETURN:
-                    if t.get("event_score") == FRAGMENTED_EVENT:
-                        t["event_score"] = FRAGMENTED_AND_MERGED
-                    else:
-                        t["event_score"] = MERGED_EVENT
-
-                if t.get("event_score") == FRAGMENTED_EVENT:
-                    if d.get("event_score") == MERGING_RETURN:
-                        d["event_score"] = FRAGMENTING_AND_MERGING
-                    else:
-                        d["event_score"] = FRAGMENTING_RETURN
-                        
     #3rd pass, anything so far unscored is then Correct
-    for d in detected+truths:
-        if not d.get("event_score"):
-            d["event_score"] = CORRECT
-                        
-    #count up the scores
+    for x in detected+truths:
+        if not x.item.get("event_score"):
+            x.item["event_score"] = CORRECT
+
+def count_events(truths, detected):
+    """count up the event scores of the `truths` and `detected` items"""
     d_counts = {CORRECT:0,
                 FRAGMENTING_RETURN:0,
                 MERGING_RETURN:0,
@@ -283,6 +442,149 @@ def score_events(truths, detected, segs):
 
     return dict(truths=truths, detected=detected, d_counts=d_counts, t_counts=t_counts, d_rates=pct_dict(d_counts), t_rates=pct_dict(t_counts))
 
+class StreamScorer(object):
+    """incremental `score_results` of a case whose detections arrive window by window in time order, e.g. from
+    `get_results(time_range)` of a recognizer fed the data of one window after the other.
+
+    `labels` are the ground truth items of the case and `t1` its start. `add` takes the detections returned for each
+    window: those ending within the window are accepted, those still running past its end hold back the scoring from
+    their start on. Everything before that moving boundary (the cut) is finalized as it goes, so only the segments and
+    items that later detections could still change are scored again: a segment gets its error class once the score of
+    the next one is final, and items get their event scores in groups between times that no item spans.
+    `partial` returns the scores so far, and `finish` those of the whole case, the same as `score_results` of
+    `labels` and the accepted `detected`. As `finish` returns all the segments and detections of the case, they are
+    kept until then: the scoring work is incremental, the memory still grows with the case.
+
+    Detections are assumed to be reported for every window they overlap. If one starts before the cut already scored,
+    the scorer falls back to scoring the whole case in `finish`.
+    """
+
+    def __init__(self, labels, t1):
+        self.labels = labels
+        self.t1 = t1
+        self.case_t1 = Span(dict(t1=t1, t2=t1))
+        self.truths = spans(labels)
+        self.detected = [] #accepted detections
+        self.inactive = sorted(self.truths, key=lambda x: x.t1, reverse=True) #truths starting after the cut
+        self.active_truths, self.active_detected = [], [] #started before the cut, without event score so far
+        self.done_truths, self.done_detected = [], [] #items with final event scores
+
+        #pending boundaries as (t, source, index, end, datetime), popped in the order `extract_segments` sorts them
+        self.entries = [(t, 0, i, k, dt) for i, x in enumerate(self.truths) for k, (t, dt) in enumerate(((x.t1, x.dt1), (x.t2, x.dt2)))]
+        heapq.heapify(self.entries)
+
+        self.times, self.dates = [], [] #final boundaries
+        self.scores = [] #basic scores of the segments between the final boundaries
+        self.errs = [] #error classes of the segments scored so far, those with a final next segment
+        self.event_seg = 0 #first segment not yet used for event scores
+        self.secs = np.zeros(NO_CLASS+1)
+        self.hits = np.zeros(NO_CLASS+1, dtype=np.int64)
+        self.start = None #end of the previous window
+        self.cut = float("-inf")
+        self.failed = False
+
+    def add(self, items, end):
+        """add the detected `items` returned for the window ending at `end` (epoch microseconds), and score up to the new cut"""
+        cut = end
+        for x in spans(items):
+            if x.t2 > end:
+                cut = min(cut, x.t1)
+            elif self.start is None or x.t2 > self.start:
+                self.accept(x)
+        self.start = end
+        self.advance(cut)
+
+    def accept(self, x):
+        if x.t1 < self.cut:
+            warn("detection %s - %s starts before the scored part of the case, scoring it as a whole" % (x.item["t1"], x.item["t2"]))
+            self.failed = True
+        i = len(self.detected)
+        self.detected.append(x)
+        self.active_detected.append(x)
+        heapq.heappush(self.entries, (x.t1, 1, i, 0, x.dt1))
+        heapq.heappush(self.entries, (x.t2, 1, i, 1, x.dt2))
+
+    def advance(self, cut, case_t2=None):
+        """finalize the boundaries up to `cut` and score what they make final. `case_t2` (a `Span`) ends the case"""
+        if self.failed:
+            return
+        self.cut = cut
+        while self.inactive and self.inactive[-1].t1 <= cut:
+            self.active_truths.append(self.inactive.pop())
+
+        #later items only add boundaries after those up to the cut, so these are final
+        bounds = []
+        while self.entries and self.entries[0][0] <= cut:
+            t, source, i, k, dt = heapq.heappop(self.entries)
+            bounds.append((t, dt))
+        if not self.times and bounds and self.case_t1.t1 < bounds[0][0]:
+            bounds.insert(0, (self.case_t1.t1, self.case_t1.dt1))
+        if case_t2 is not None:
+            last = bounds[-1][0] if bounds else self.times[-1] if self.times else None
+            if last is not None and case_t2.t2 > last:
+                bounds.append((case_t2.t2, case_t2.dt2))
+        if bounds:
+            segs = Segments([(self.times[-1], self.dates[-1])] + bounds if self.times else bounds)
+            self.scores += basic_scores(segs, self.active_truths, self.active_detected)
+            self.times += [t for t, dt in bounds]
+            self.dates += [dt for t, dt in bounds]
+
+        final = case_t2 is not None
+        lo = len(self.errs)
+        hi = len(self.scores) if final else len(self.scores) - 1
+        if hi <= lo:
+            return
+        base = max(lo - 1, 0)
+        self.errs += segment_errors(self.scores[base:hi+1], lo - base, hi - base, first=base == 0, last=final)
+        segs = self.segments(lo, hi)
+        classes = segs.frame_classes()
+        self.secs += np.bincount(classes, weights=segs.durations(), minlength=NO_CLASS+1)
+        self.hits += np.bincount(classes, minlength=NO_CLASS+1)
+
+        #event scores of the items ending by the last time up to the scored segments that no item spans
+        e = float("inf") if final else self.times[hi]
+        while True:
+            inside = [x.t1 for x in self.active_truths + self.active_detected if x.t1 < e < x.t2]
+            if not inside:
+                break
+            e = min(inside)
+        truths = [x for x in self.active_truths if x.t2 <= e]
+        detected = [x for x in self.active_detected if x.t2 <= e]
+        if not truths and not detected:
+            return
+        assign_events(truths, detected, self.segments(self.event_seg, hi))
+        self.active_truths = [x for x in self.active_truths if x.t2 > e]
+        self.active_detected = [x for x in self.active_detected if x.t2 > e]
+        self.done_truths += [x.item for x in truths]
+        self.done_detected += [x.item for x in detected]
+        self.event_seg = min(bisect.bisect_left(self.times, e, self.event_seg), hi)
+
+    def segments(self, lo, hi):
+        """return `Segments` of the scored segments `lo` to `hi`"""
+        segs = Segments(zip(self.times[lo:hi+1], self.dates[lo:hi+1]))
+        segs.score = np.array([SCORES.index(x) for x in self.scores[lo:hi]], dtype=np.int8)
+        segs.err = np.array([ERRORS.index(x) for x in self.errs[lo:hi]], dtype=np.int8)
+        return segs
+
+    def partial(self):
+        """return the frame and event scores of the part of the case scored so far, up to `t` (epoch microseconds)"""
+        events = count_events(self.done_truths, self.done_detected)
+        del events["truths"], events["detected"]
+        return dict(t=self.times[len(self.errs)] if self.errs else None, frame_score=frame_rates(frame_counts(self.secs, self.hits)),
+                    events=events)
+
+    def finish(self, t2):
+        """score the rest of the case ending at `t2`, and return its scores as `score_results`"""
+        self.advance(float("inf"), Span(dict(t1=t2, t2=t2)))
+        if self.failed or not self.times:
+            for x in self.truths + self.detected:
+                x.item.pop("event_score", None)
+            return score_results(dict(labels=self.labels, detected=[x.item for x in self.detected], t1=self.t1, t2=t2))
+        segs = self.segments(0, len(self.scores))
+        return dict(segments=segs,
+                    frame_score=score_frames(segs),
+                    events=count_events([x.item for x in self.truths], [x.item for x in self.detected]))
+
 DEFAULT_WINDOW_WIDTH=3
 
 def sliding_window(seq, n=DEFAULT_WINDOW_WIDTH):
@@ -311,37 +613,353 @@ def pct_dict(d):
 def warn(msg):
     print "WARNING:", msg
 
+def overlap_index(segs, items):
+    """sweep over time ordered `Segments` and return, for each segment, the index of the last
+    span in `items` that overlaps it in the sense of `time_overlap`, or -1 if none does.
+
+    Since both the segment starts and ends are sorted, the segments overlapping an item form a contiguous run
+    found by bisection. The sweep then keeps a heap of the items covering the current segment, so the whole
+    pass is O((segments + items) log items) instead of comparing every segment with every item.
+    """
+    los, his = segment_runs(segs, items)
+    starts = defaultdict(list) #(-item index, end of run) keyed on first segment of run
+    for i, (lo, hi) in enumerate(itertools.izip(los.tolist(), his.tolist())):
+        if lo < hi:
+            starts[lo].append((-i, hi))
+
+    idx = []
+    active = []
+    for k in xrange(len(segs)):
+        for run in starts.get(k, ()):
+            heapq.heappush(active, run)
+        while active and active[0][1] <= k:
+            heapq.heappop(active)
+        idx.append(-active[0][0] if active else -1)
+    return idx
+
+def segment_runs(segs, items):
+    """return arrays of the first and one past the last index of the `Segments` overlapping each span in `items`"""
+    t1s, t2s = segs.times[:-1], segs.times[1:]
+    los = np.searchsorted(t2s, [x.t1 for x in items], side="right") #first segment ending after item starts
+    his = np.searchsorted(t1s, [x.t2 for x in items], side="left") #first segment starting at or after item ends
+    return los, his
+
+def overlap_pairs(a, b):
+    """return list of (i, j) for all overlapping spans `a[i]` and `b[j]`.
+    a sweep over the spans ordered by start time, pairing each span with the spans of the other list that are still
+    open, so the cost is O(n log n) plus the number of pairs rather than len(a) * len(b).
+    """
+    starts = sorted([(x.t1, 0, i) for i, x in enumerate(a)] + [(x.t1, 1, j) for j, x in enumerate(b)])
+    spans = (a, b)
+    active = ([], []) #heaps of (t2, index) of the open spans of a and b
+    pairs = []
+    for t1, side, i in starts:
+        x = spans[side][i]
+        other = active[1-side]
+        while other and other[0][0] <= t1: #ended, can't overlap this or any later span
+            heapq.heappop(other)
+        for t2, j in other:
+            if overlaps(x, spans[1-side][j]):
+                pairs.append((i, j) if side == 0 else (j, i))
+        heapq.heappush(active[side], (x.t2, i))
+    pairs.sort()
+    return pairs
+
 def time_overlap(d1, d2):
     """return True if the t1, t2 in d1 overlap t1, t2 in d2."""
     gt1, gt2, vt1, vt2 = parse_date(d1["t1"]), parse_date(d1["t2"]), parse_date(d2["t1"]), parse_date(d2["t2"])
     return (gt1 != vt2) and (vt1 != gt2) and (gt1 <= vt2) and (vt1 <= gt2) 
 
 
-def score_aggregate(results):
-    """compute aggregate scores and stats from list of detection results"""
-    scores = []
-    truth_count = detected_count = segment_count = 0
-
+def score_aggregate(results, resamples=0, seed=0, block=0):
+    """compute aggregate scores and stats from list of detection results, with the bootstrap confidence intervals of
+    `resamples` of the results (or of `block` seconds of them) if given"""
+    agg = Aggregate()
     for res in results:
-        scores.append(res["scores"])
-        truth_count += len(res["labels"])
-        detected_count += len(res["detected"])
-        segment_count += len(res["scores"]["segments"])
-
-    ret = dict()
-    ret["scores"] = sum_scores(scores)
-    ret["stats"] = dict(truth_count=truth_count, detected_count=detected_count, segment_count=segment_count)
-    return ret
-    
+        agg.add(res, block)
+    return agg.to_json(resamples, seed)
 
-def sum_scores(scores):
-    """sum up the scores"""
-    segs = itertools.chain(*[x["segments"][:] for x in scores]) #all the segs in flat list
-    d_counts = sum_dicts([x["events"]["d_counts"] for x in scores])
-    t_counts = sum_dicts([x["events"]["t_counts"] for x in scores])
-    d_rates = pct_dict(d_counts)
-    t_rates = pct_dict(t_counts)
-    return dict(frame_scores=score_frames(segs), event_scores=dict(d_counts=d_counts, t_counts=t_counts, d_rates=d_rates, t_rates=t_rates))
+class Aggregate(object):
+    """running aggregate scores and stats of detection results, added one at a time.
+    only the frame durations and event counts are kept, so each result can be dropped once it is added.
+    the durations are integer microseconds, so aggregates add up to the same in any order or grouping.
+    """
+
+    def __init__(self):
+        self.usecs = np.zeros(NO_CLASS+1, dtype=np.int64) #microseconds of each frame class
+        self.hits = np.zeros(NO_CLASS+1, dtype=np.intp) #segments of each frame class
+        self.d_counts = defaultdict(int)
+        self.t_counts = defaultdict(int)
+        self.truth_count = self.detected_count = self.segment_count = 0
+        self.cost = None #summed cost scores of the results, with the `cases` they were measured on
+        self.units = [] #`unit_counters` of each resampling unit of the results, for `bootstrap_ci`
+
+    def add(self, res, block=0):
+        """add scored result `res`, resampled as one unit, or as one unit per `block` seconds of it if given"""
+        segs = res["scores"]["segments"]
+        classes = segs.frame_classes()
+        usecs = np.bincount(classes, weights=np.diff(segs.times), minlength=NO_CLASS+1).astype(np.int64) #exact below 2**53
+        self.usecs += usecs
+        self.hits += np.bincount(classes, minlength=NO_CLASS+1)
+        events = res["scores"]["events"]
+        if block and len(segs) and segs.times[-1] > segs.times[0]:
+            self.units.extend(block_units(res, block))
+        else:
+            self.units.append(unit_counters(usecs, events["t_counts"], events["d_counts"]))
+        for counts, d in ((self.d_counts, res["scores"]["events"]["d_counts"]), (self.t_counts, res["scores"]["events"]["t_counts"])):
+            for k, v in d.iteritems():
+                counts[k] += v
+        self.truth_count += len(res["labels"])
+        self.detected_count += len(res["detected"])
+        self.segment_count += len(segs)
+        if "cost" in res["scores"]:
+            self.cost = sum_costs(filter(None, [self.cost, res["scores"]["cost"]]))
+
+    def merge(self, other):
+        """add the aggregate `other`, e.g. of the results of one case"""
+        self.usecs = self.usecs + other.usecs
+        self.hits = self.hits + other.hits
+        for counts, d in ((self.d_counts, other.d_counts), (self.t_counts, other.t_counts)):
+            for k, v in d.iteritems():
+                counts[k] += v
+        self.truth_count += other.truth_count
+        self.detected_count += other.detected_count
+        self.segment_count += other.segment_count
+        if other.cost:
+            self.cost = sum_costs(filter(None, [self.cost, other.cost]))
+        self.units.extend(other.units)
+
+    def to_json(self, resamples=0, seed=0):
+        """return the aggregate scores and stats, with the `bootstrap_ci` of `resamples` seeded with `seed`, if given"""
+        event_scores = dict(d_counts=self.d_counts, t_counts=self.t_counts, d_rates=pct_dict(self.d_counts), t_rates=pct_dict(self.t_counts))
+        ret = dict()
+        ret["scores"] = dict(frame_scores=frame_rates(frame_counts(self.usecs / 1e6, self.hits)), event_scores=event_scores)
+        if resamples and self.units:
+            ret["scores"]["ci"] = bootstrap_ci(self.units, resamples, seed)
+        if self.cost:
+            ret["scores"]["cost"] = self.cost
+        ret["stats"] = dict(truth_count=self.truth_count, detected_count=self.detected_count, segment_count=self.segment_count)
+        return ret
+
+    def summary(self):
+        """return the running counters, as json, for `from_summary`"""
+        d = dict(usecs=self.usecs.tolist(), hits=self.hits.tolist(), d_counts=dict(self.d_counts), t_counts=dict(self.t_counts),
+                 truth_count=self.truth_count, detected_count=self.detected_count, segment_count=self.segment_count, cost=self.cost)
+        if self.units:
+            d["units"] = self.units
+        return d
+
+    @classmethod
+    def from_summary(cls, d):
+        """return the `Aggregate` of the counters `d` written by `summary`"""
+        agg = cls()
+        agg.usecs = np.array(d["usecs"], dtype=np.int64)
+        agg.hits = np.array(d["hits"], dtype=np.intp)
+        agg.d_counts.update(d["d_counts"])
+        agg.t_counts.update(d["t_counts"])
+        agg.truth_count, agg.detected_count, agg.segment_count = d["truth_count"], d["detected_count"], d["segment_count"]
+        agg.cost = d.get("cost")
+        agg.units = list(d.get("units", ()))
+        return agg
+
+def unit_counters(usecs, t_counts, d_counts):
+    """return the counters of a resampling unit: the microseconds of each of the `FRAME_CLASSES`, then the counts of
+    the `TRUTH_EVENTS` and `DETECTED_EVENTS`"""
+    return (usecs[:NO_CLASS].tolist() + [t_counts.get(k, 0) for k in TRUTH_EVENTS] +
+            [d_counts.get(k, 0) for k in DETECTED_EVENTS])
+
+def block_units(res, block):
+    """return the `unit_counters` of each `block` seconds of scored result `res`, from its start. a segment counts
+    for the blocks it spans by its time in each, an event for the block it starts in"""
+    segs = res["scores"]["segments"]
+    w = max(int(block * 1e6), 1)
+    edges = np.append(np.arange(segs.times[0], segs.times[-1], w), segs.times[-1])
+    n = len(edges) - 1
+    counts = [Coverage(segs.times, segs.frame_classes(), NO_CLASS+1).durations(edges)[:, :NO_CLASS]]
+    for items, keys in ((res["scores"]["events"]["truths"], TRUTH_EVENTS), (res["scores"]["events"]["detected"], DETECTED_EVENTS)):
+        t1s = np.array([to_epoch(parse_date(x["t1"])) for x in items], dtype=np.int64)
+        b = np.clip((t1s - edges[0]) // w, 0, n - 1)
+        k = np.array([keys.index(x["event_score"]) for x in items], dtype=np.intp)
+        counts.append(np.bincount(b * len(keys) + k, minlength=n * len(keys)).reshape(n, len(keys)))
+    return np.hstack(counts).tolist()
+
+CI_LEVEL = 0.95
+BOOTSTRAP_CHUNK = 1 << 20 #resample weights drawn at a time, to bound the memory of many resamples of many units
+
+def bootstrap_ci(units, resamples, seed=0, level=CI_LEVEL):
+    """return the bootstrap confidence intervals of the aggregate frame and event rates, from the `unit_counters` of
+    the resampling `units`. each resample draws as many units with replacement, and its counters are summed as a
+    product of the number of times each unit is drawn with the counters, so the results are never re-scored. each
+    interval is the [lo, hi] percentiles of a rate over the resamples, leaving out those where it is undefined
+    (e.g. without negative frames), None if it always is"""
+    c = np.array(units, dtype=np.float64) #exact below 2**53
+    n = len(c)
+    rng = np.random.RandomState(seed)
+    chunk = max(BOOTSTRAP_CHUNK // n, 1)
+    sums = np.vstack([np.dot(rng.multinomial(n, np.ones(n) / n, size=min(chunk, resamples - i)), c)
+                      for i in xrange(0, resamples, chunk)])
+
+    q = [50 * (1 - level), 50 * (1 + level)]
+    def interval(x):
+        x = x[~np.isnan(x)]
+        return np.percentile(x, q).tolist() if len(x) else None
+    def intervals(d):
+        return dict((k, intervals(v) if isinstance(v, dict) else interval(v)) for k, v in d.iteritems())
+
+    f = dict(zip(FRAME_CLASSES, sums[:, :NO_CLASS].T))
+    t, d = np.hsplit(sums[:, NO_CLASS:], [len(TRUTH_EVENTS)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pos, neg = sum(f[k] for k in POS_CLASSES), sum(f[k] for k in NEG_CLASSES)
+        frame_scores = dict(acc=(f["TP"] + f["TN"]) / (pos + neg), p_rate=pos / (pos + neg), n_rate=neg / (pos + neg),
+                            p_rates=dict((k+"r", f[k] / pos) for k in POS_CLASSES), n_rates=dict((k+"r", f[k] / neg) for k in NEG_CLASSES))
+        event_scores = dict(t_rates=dict((k, t[:, i] / t.sum(axis=1)) for i, k in enumerate(TRUTH_EVENTS)),
+                            d_rates=dict((k, d[:, i] / d.sum(axis=1)) for i, k in enumerate(DETECTED_EVENTS)))
+    return dict(level=level, resamples=resamples, units=n, frame_scores=intervals(frame_scores), event_scores=intervals(event_scores))
+
+def label_aggregates(res):
+    """return an `Aggregate` of the scored result `res` for each of its labels, keyed on label. a segment counts for
+    the label of the truth overlapping it, else of the detection overlapping it, else for None, as does the cost of the
+    result. truth and detected events count for their own label"""
+    segs = res["scores"]["segments"]
+    truths, detected = res["scores"]["events"]["truths"], res["scores"]["events"]["detected"]
+    names = [None] + sorted(set(x["label"] for x in truths + detected))
+    code = dict((name, k) for k, name in enumerate(names))
+
+    #label code of the truth and detection overlapping each segment, the appended 0 (None) where none does
+    t_codes = np.array([code[x["label"]] for x in truths] + [0], dtype=np.intp)
+    d_codes = np.array([code[x["label"]] for x in detected] + [0], dtype=np.intp)
+    ti = np.array(overlap_index(segs, spans(truths)), dtype=np.intp)
+    di = np.array(overlap_index(segs, spans(detected)), dtype=np.intp)
+    seg_codes = np.where(ti >= 0, t_codes[ti], d_codes[di])
+
+    m = NO_CLASS+1
+    cells = seg_codes * m + segs.frame_classes()
+    usecs = np.bincount(cells, weights=np.diff(segs.times), minlength=len(names) * m).reshape(len(names), m).astype(np.int64)
+    hits = np.bincount(cells, minlength=len(names) * m).reshape(len(names), m)
+
+    aggs = {}
+    for k, name in enumerate(names):
+        agg = aggs[name] = Aggregate()
+        agg.usecs, agg.hits = usecs[k], hits[k].astype(np.intp)
+        events = count_events([x for x in truths if x["label"] == name], [x for x in detected if x["label"] == name])
+        agg.d_counts.update(events["d_counts"])
+        agg.t_counts.update(events["t_counts"])
+        agg.truth_count, agg.detected_count = len(events["truths"]), len(events["detected"])
+        agg.segment_count = int(hits[k].sum())
+    aggs[None].cost = res["scores"].get("cost")
+    return aggs
+
+class Rollup(object):
+    """mergeable summaries of scored results: an `Aggregate` of frame seconds and event counts per label of each result
+    (see `label_aggregates`), keyed on `KEYS`. the date is that of the start of the case, in its own time zone.
+    since aggregates add associatively, the scores of any slice, e.g. per recognizer or per label and device, are
+    rolled up from the summaries alone, and the summaries of separate runs (or workers) can be merged.
+    """
+    KEYS = ("recognizer", "label", "device", "date")
+
+    def __init__(self):
+        self.aggs = {} #Aggregate keyed on tuple of `KEYS` values
+
+    def get(self, key):
+        agg = self.aggs.get(key)
+        if agg is None:
+            agg = self.aggs[key] = Aggregate()
+        return agg
+
+    def add(self, res):
+        """add the summaries of scored result `res`"""
+        date = parse_date(res["t1"]).date().isoformat() if res.get("t1") else None
+        for label, agg in label_aggregates(res).iteritems():
+            self.get((res.get("recognizer"), label, res.get("device"), date)).merge(agg)
+
+    def merge(self, other):
+        """add the summaries of the `Rollup` `other`"""
+        for key, agg in other.aggs.iteritems():
+            self.get(key).merge(agg)
+
+    def rollup(self, by=()):
+        """return the merged `Aggregate` of each slice of the summaries, keyed on the tuple of its values of the `KEYS`
+        named in `by`, in key order. all the summaries are merged into one, keyed on (), by default"""
+        idx = [self.KEYS.index(k) for k in by]
+        d = {}
+        for key in sorted(self.aggs):
+            slice_key = tuple(key[i] for i in idx)
+            if slice_key not in d:
+                d[slice_key] = Aggregate()
+            d[slice_key].merge(self.aggs[key])
+        return OrderedDict(sorted(d.iteritems()))
+
+    def to_json(self):
+        """return list of the summaries, with their key values"""
+        l = []
+        for key in sorted(self.aggs):
+            d = self.aggs[key].summary()
+            d.update(zip(self.KEYS, key))
+            l.append(d)
+        return l
+
+    @classmethod
+    def from_json(cls, l):
+        """return the `Rollup` of the summaries `l` written by `to_json`"""
+        rollup = cls()
+        for d in l:
+            rollup.get(tuple(d[k] for k in cls.KEYS)).merge(Aggregate.from_summary(d))
+        return rollup
+
+LATENCY_BINS = 10 #bins per decade of the latency histograms
+MIN_LATENCY = 1e-6 #seconds, upper edge of the first bin
+
+def latency_hist(latencies):
+    """return sparse histogram of `latencies` (seconds) in log spaced bins, as dict of count keyed on bin.
+    unlike percentiles, histograms can be summed over cases"""
+    lat = np.maximum(np.asarray(latencies, dtype=np.float64), MIN_LATENCY)
+    bins = np.ceil(np.log10(lat / MIN_LATENCY) * LATENCY_BINS - 1e-9).astype(np.intp)
+    return dict((int(b), int(n)) for b, n in zip(*np.unique(bins, return_counts=True)))
+
+def hist_percentile(hist, q):
+    """return the upper edge of the bin of `latency_hist` `hist` holding the `q` percentile"""
+    n = sum(hist.itervalues())
+    if not n:
+        return None
+    seen = 0
+    for b, count in sorted((int(b), c) for b, c in hist.iteritems()):
+        seen += count
+        if seen >= q / 100.0 * n:
+            return MIN_LATENCY * 10 ** (b / float(LATENCY_BINS))
+
+def latency_scores(hist, latencies=None):
+    """return latency percentiles, exact if given the `latencies`, else from their histogram"""
+    if latencies is not None:
+        if not len(latencies):
+            return {}
+        p = np.percentile(latencies, [50, 90, 99])
+        return dict(p50=float(p[0]), p90=float(p[1]), p99=float(p[2]), max=float(np.max(latencies)))
+    if not hist:
+        return {}
+    return dict(p50=hist_percentile(hist, 50), p90=hist_percentile(hist, 90), p99=hist_percentile(hist, 99),
+                max=hist_percentile(hist, 100))
+
+def cost_rates(d):
+    """add the real time factor (time in the recognizer over the time span of the data) and records per second to cost dict `d`"""
+    busy = d["process_time"] + d["results_time"]
+    d["rtf"] = busy / d["span"] if d["span"] else None
+    d["records_per_sec"] = d["records"] / d["process_time"] if d["process_time"] else None
+    return d
+
+def sum_costs(costs):
+    """sum the cost scores `costs` of many cases"""
+    d = dict(cases=0, process_calls=0, process_time=0.0, results_time=0.0, records=0, span=0.0, rss_growth=0)
+    hist = defaultdict(int)
+    for c in costs:
+        d["cases"] += c.get("cases", 1) #of the cases measured, cached results of older versions have none
+        for k in ("process_calls", "process_time", "results_time", "records", "span"):
+            d[k] += c[k]
+        d["rss_growth"] = max(d["rss_growth"], c["rss_growth"]) #peak, not cumulative
+        for b, n in c["latency_hist"].iteritems():
+            hist[int(b)] += n
+    d["latency_hist"] = dict(hist)
+    d["latency"] = latency_scores(hist)
+    return cost_rates(d)
 
 def sum_dicts(l):
     """sum dict vals in list l"""
@@ -99,6 +99,8 @@ function viz(json, fname) {
 	["Split / Merged", esc.d_rates["F'"] + esc.d_rates["FM'"] + esc.d_rates["M'"], {"class":"st_yellow", "type":ST_PCT}],
 	["Correct", esc.d_rates.C, {"class":"st_green", "type":ST_PCT}],
     ], "Detection events (" + json.stats.detected_count + ")", "stbox3");
+
+    widget_cost(div, json.scores.cost, json.results.length);
     
     //data_table(body, "Frame counts", frsc.frame_counts);
 
@@ -115,6 +117,9 @@ function viz(json, fname) {
     if (json.stats.detected_count)
 	pie_chart(div, esc.d_rates, "Detected events (" + json.stats.detected_count + ")");
 
+    body.append("div").attr("style", "clear:both;");
+    trend_chart(body, "Trend");
+
     body.append("div").attr("style", "clear:both;padding:24px;");
 
     $.each(json.results, function(index, value) {
@@ -159,19 +164,22 @@ function case_id(result) {
 }
 
 function result_details(result) {
-    //visualize the detection result
+    //visualize the detection result. results in sharded scores files only hold the headline numbers,
+    //the full result is loaded from its `detail` file when the case is opened
     case_num += 1;
     var body = d3.select("body");
-    var detail_id = "detail_"+case_id(result);
+
+    var stats = result.stats || {"truth_count":result.labels.length, "detected_count":result.detected.length, "segment_count":result.scores.segments.length};
+    var label_span = result.label_span || (result.labels.length > 0 ? [result.labels[0].t1, result.labels[result.labels.length-1].t2] : null);
 
     widget_h2(body, "Case " + case_num + ": &nbsp;<code>"+result.labels_file  +" --> " + result.recognizer + "</code>", "case_"+case_id(result));
 
     var div = body.append("div").attr("class", "brow ssect");
 
-    if (result.labels.length > 0)
-	widget_overview(div, parse_isotime(result.labels[0].t1), parse_isotime(result.labels[result.labels.length-1].t2), result.subject, "Overview");
+    if (label_span)
+	widget_overview(div, parse_isotime(label_span[0]), parse_isotime(label_span[1]), result.subject, "Overview");
 
-    widget_box3(div, [ ["Labels", result.labels.length], ["Detected", result.detected.length], ["Segments", result.scores.segments.length] ], "Test Cases", "stbox2");
+    widget_box3(div, [ ["Labels", stats.truth_count], ["Detected", stats.detected_count], ["Segments", stats.segment_count] ], "Test Cases", "stbox2");
 
     var fsc = result.scores.frame_score;
 
@@ -194,16 +202,49 @@ function result_details(result) {
 	["Deletion", esc.t_rates.D, {"class":"st_red", "type":ST_PCT}],
 	["Split / Merged", esc.t_rates.F + esc.t_rates.M + esc.t_rates.FM, {"class":"st_yellow", "type":ST_PCT}],
 	["Correct", esc.t_rates.C, {"class":"st_green", "type":ST_PCT}], 
-    ], "Truth events (" + result.labels.length  + ")", "stbox3");
+    ], "Truth events (" + stats.truth_count  + ")", "stbox3");
 
     widget_box3(div, [
 	["Insertion", esc.d_rates["I'"], {"class":"st_red", "type":ST_PCT}],
 	["Split / Merged", esc.d_rates["F'"] + esc.d_rates["M'"] + esc.d_rates["FM'"], {"class":"st_yellow", "type":ST_PCT}],
 	["Correct", esc.d_rates["C"], {"class":"st_green", "type":ST_PCT}], 
-    ], "Detected events (" + result.detected.length  + ")", "stbox3");
+    ], "Detected events (" + stats.detected_count  + ")", "stbox3");
+
+    widget_cost(div, result.scores.cost);
 
     body.append("div").attr("style", "clear:both;");
 
+    var node = body.append("div");
+    if (result.detail == undefined) {
+	case_charts(node, result, stats);
+    } else if (result.timeline != undefined) {
+	//long case, drawn from its timeline tiles instead of loading the whole result
+	timeline_chart(node, result);
+	score_charts(node, result, stats);
+    } else {
+	var link = node.append("div").attr("class", "case_link").append("a")
+	    .attr("href", "javascript:void(0)")
+	    .text("Show details");
+	link.on("click", function() {
+	    link.text("Loading...").on("click", null);
+	    d3.json(result.detail, function(json) {
+		node.html("");
+		if (json==null||json==undefined) {
+		    node.append("div").attr("class", "case_link").text("Failed to load " + result.detail);
+		    return;
+		}
+		case_charts(node, json, stats);
+	    });
+	});
+    }
+
+    body.append("div").attr("style", "clear:both;padding:24px;");
+}
+
+function case_charts(body, result, stats) {
+    //charts of the segments and samples of a full detection result, then its scores
+    var detail_id = "detail_"+case_id(result);
+
     var truth_times = $.map(result.labels, function(item, i) { return {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "label":item.label}; });
     var detected_times = $.map(result.detected, function(item, i) { return {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "label":item.label}; });
     var segments = $.map(result.scores.segments, function(item, i) { return {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "err":item.err, "score":item.score}; });
@@ -255,6 +296,14 @@ function result_details(result) {
 	});
     }
 
+    score_charts(body, result, stats);
+}
+
+function score_charts(body, result, stats) {
+    //pie charts of the frame and event scores of a result, and its event analysis diagram
+    var fsc = result.scores.frame_score;
+    var esc = result.scores.events;
+
     body.append("div").attr("style", "clear:both;");
 
     var div = body.append("div").attr("class", "brow");
@@ -271,15 +320,143 @@ function result_details(result) {
 
     var div = body.append("div").attr("class", "brow");
 
-    if (result.labels.length > 0)
-	pie_chart(div, esc.t_rates, "Truth events (" + result.labels.length + ")");
+    if (stats.truth_count > 0)
+	pie_chart(div, esc.t_rates, "Truth events (" + stats.truth_count + ")");
 
-    if (result.detected.length > 0)
-	pie_chart(div, esc.d_rates, "Detected events (" + result.detected.length + ")");
+    if (stats.detected_count > 0)
+	pie_chart(div, esc.d_rates, "Detected events (" + stats.detected_count + ")");
 
     var div = body.append("div").attr("class", "brow ead");
     ead_chart(div, result.scores.events.t_counts, result.scores.events.d_counts);
-
-    body.append("div").attr("style", "clear:both;padding:24px;");
 }
 
+
+function timeline_chart(body, result) {
+    //zoomable interval chart of a long case, drawn from its timeline tiles: time buckets summarizing the segments,
+    //labels and detections of the tiles of the level matching the zoom, down to the leaf tiles holding them
+    var tl = result.timeline;
+    var detail_id = "detail_"+case_id(result);
+    var tiles = {}; //loaded tile, or list of callbacks while loading, keyed on "<level>-<index>"
+    var view = 0; //drawn view, so tiles loaded for an earlier one are not drawn
+
+    function load(level, index, cb) {
+	var key = level + "-" + index;
+	if (tiles[key] == undefined) {
+	    tiles[key] = [cb];
+	    d3.json(tl.path + "/" + key + ".json", function(tile) {
+		var cbs = tiles[key];
+		tiles[key] = tile;
+		$.each(cbs, function(i, f) { f(tile); });
+	    });
+	} else if ($.isArray(tiles[key])) {
+	    tiles[key].push(cb);
+	} else {
+	    cb(tiles[key]);
+	}
+    }
+
+    function tile_at(level, index, cb) {
+	//call cb with tile `index` of `level`, or the leaf tile above it
+	function step(tile) {
+	    if (tile == null || tile.leaf || tile.level == level)
+		return cb(tile);
+	    load(tile.level+1, Math.floor(index / Math.pow(tl.fanout, level-tile.level-1)), step);
+	}
+	load(0, 0, step);
+    }
+
+    var div = body.append("div").attr("class", "stbox st_interval_box");
+    div.append("div").attr("id", detail_id).attr("class", "item_detail")
+	.text("Loading the timeline (" + tl.levels + " levels of detail, scroll to zoom)...");
+    var svg = div.append("svg:svg")
+	.attr("width", width+(x_offset*2)+x_pad)
+	.attr("height", height);
+    svg.append("svg:clipPath").attr("id", "clip_"+detail_id)
+	.append("svg:rect").attr("x", x_offset).attr("width", width).attr("height", height);
+    var chart = svg.append("svg:g");
+
+    load(0, 0, function(root) {
+	if (root == null) {
+	    d3.select("#"+detail_id).text("Failed to load the timeline of " + result.detail);
+	    return;
+	}
+	d3.select("#"+detail_id).text("");
+	var x = d3.time.scale().domain([root.t1, root.t2]).range([0, width]);
+	svg.call(d3.behavior.zoom().x(x).scaleExtent([1, Infinity]).on("zoom", function() { update(x, root); }));
+	update(x, root);
+    });
+
+    function update(x, root) {
+	//draw the tiles of the level with a tile about as long as the visible time range, down to the leaves
+	var dom = x.domain(), span = root.t2 - root.t1;
+	var level = Math.max(0, Math.min(tl.levels-1, Math.floor(Math.log(span / (dom[1] - dom[0])) / Math.log(tl.fanout))));
+	var n = Math.pow(tl.fanout, level);
+	var lo = Math.max(0, Math.floor((dom[0] - root.t1) * n / span)), hi = Math.min(n-1, Math.floor((dom[1] - root.t1) * n / span));
+	var shown = {}, pending = hi - lo + 1, this_view = ++view;
+	for (var i = lo; i <= hi; i++) {
+	    tile_at(level, i, function(tile) {
+		if (tile != null)
+		    shown[tile.level + "-" + tile.index] = tile;
+		if (--pending == 0 && this_view == view)
+		    draw_tiles(x, $.map(shown, function(t) { return t; }));
+	    });
+	}
+    }
+
+    function draw_tiles(x, shown) {
+	var data = {"labels":[], "detected":[], "segments":[]}, seen = {};
+	function add(k, item) {
+	    //leaf tiles repeat the items overlapping their bounds
+	    var key = k + item.t1 + item.t2;
+	    if (!seen[key]) {
+		seen[key] = true;
+		data[k].push(item);
+	    }
+	}
+	$.each(shown, function(i, tile) {
+	    if (tile.leaf) {
+		$.each(["labels", "detected"], function(j, k) {
+		    $.each(tile[k], function(m, item) { add(k, {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "label":item.label}); });
+		});
+		$.each(tile.segments, function(m, item) { add("segments", {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "err":item.err, "score":item.score}); });
+	    } else {
+		var w = (tile.t2 - tile.t1) / tl.buckets;
+		for (var b = 0; b < tl.buckets; b++) {
+		    var t1 = tile.t1 + b*w, t2 = t1 + w;
+		    if (t2 < x.domain()[0] || t1 > x.domain()[1])
+			continue;
+		    if (tile.labels[b] > 0)
+			data.labels.push({"t1":t1, "t2":t2, "label":tile.labels_label[b], "cover":tile.labels[b]});
+		    if (tile.detected[b] > 0)
+			data.detected.push({"t1":t1, "t2":t2, "label":tile.detected_label[b], "cover":tile.detected[b]});
+		    data.segments.push({"t1":t1, "t2":t2, "score":tile["class"][b], "classes":tile.classes[b]});
+		}
+	    }
+	});
+
+	chart.selectAll("*").remove();
+	var xticks = x.ticks(12);
+	chart.selectAll("line")
+	    .data(xticks)
+	    .enter().append("svg:line")
+	    .attr("x1", function(d) { return x(d) + x_offset; } )
+	    .attr("x2", function(d) { return x(d) + x_offset; } )
+	    .attr("y1", 0)
+	    .attr("y2", height-18)
+	    .attr("stroke", "#555");
+
+	var rows = chart.append("svg:g").attr("clip-path", "url(#clip_"+detail_id+")");
+	interval_chart(rows, data.labels, x, "truth_chart", bar_pad, detail_id);
+	interval_chart(rows, data.detected, x, "detected_chart", bar_h + 2*bar_pad, detail_id);
+	interval_chart(rows, data.segments, x, "segment_chart", bar_h*2 + 3*bar_pad, detail_id, tl.classes);
+
+	chart.selectAll(".xlabel")
+	    .data(xticks)
+	    .enter().append("svg:text")
+	    .attr("class", "xlabel")
+	    .text(function(d) { return tms_fmt(new Date(d)); })
+	    .attr("x", function(d) { return x_offset + x(d) })
+	    .attr("y", height-4)
+	    .attr("text-anchor", "middle");
+    }
+}
@@ -99,6 +99,25 @@ function widget_box3(node, data, label, klass) {
     });
 }
 
+var rate_fmt = d3.format(",.0f");
+
+function widget_cost(node, cost, cases) {
+    //computational cost of recognizers: real time factor, throughput and latency, of the `cases` of the scores
+    //when given, noting if it was only measured on some of them
+    if (!cost)
+	return;
+    var title = "Cost (" + cost.process_calls + " calls";
+    if (cases != undefined && cost.cases != undefined && cost.cases < cases)
+	title += ", " + cost.cases + " of " + cases + " cases";
+    var ms = function(t) { return t == null ? null : (t*1000).toPrecision(3) + " ms"; };
+    widget_box3(node, [
+	["Real-time factor", cost.rtf == null ? null : cost.rtf.toPrecision(3)],
+	["Records / s", cost.records_per_sec == null ? null : rate_fmt(cost.records_per_sec)],
+	["p90 latency", ms(cost.latency.p90)],
+	["Memory growth", (cost.rss_growth/1048576).toFixed(1) + " MB"]
+    ], title + ")", "stbox3");
+}
+
 var SCORES_DIR = "scores/"; 
 
 var SCORES_LIST = SCORES_DIR + "scores_list.json";
@@ -155,6 +174,76 @@ function widget_title(node, title, json) {
     node.append("div").attr("style", "clear:both;");
 }
 
+var HISTORY_FILE = SCORES_DIR + "history.jsonl";
+
+function trend_chart(node, title) {
+    //frame accuracy and correct truth event rate of each recognizer over the runs in the history file
+    var div = node.append("div").attr("class", "brow");
+    d3.text(HISTORY_FILE, function(text) {
+	if (!text)
+	    return;
+
+	var runs = {}; //points keyed on recognizer
+	$.each(text.split("\n"), function(i, line) {
+	    if (!line)
+		return;
+	    var r = JSON.parse(line);
+	    if (!runs[r.recognizer])
+		runs[r.recognizer] = [];
+	    runs[r.recognizer].push({"t":parse_isotime(r.t), "acc":r.scores.frame_scores.acc, "C":r.scores.event_scores.t_rates.C});
+	});
+	var rzs = d3.keys(runs);
+	var all = d3.merge(d3.values(runs));
+	if (all.length < 2)
+	    return; //nothing to trend yet
+
+	var w = 520, h = 140, pad = 24;
+	var x = d3.time.scale()
+	    .domain(d3.extent(all, function(d) { return d.t; }))
+	    .range([pad, w-pad]);
+	var y = d3.scale.linear().domain([0, 1]).range([h-pad, 8]);
+	var color = d3.scale.category10();
+
+	$.each([["acc", "Frame accuracy"], ["C", "Correct truth events"]], function(i, m) {
+	    var box = div.append("div").attr("class", "stbox st_trend");
+	    box.append("div").attr("class", "stlblpie").text(title + ": " + m[1]);
+	    var chart = box.append("svg:svg").attr("width", w).attr("height", h).append("svg:g");
+
+	    chart.selectAll("line")
+		.data(y.ticks(4))
+		.enter().append("svg:line")
+		.attr("x1", pad).attr("x2", w-pad)
+		.attr("y1", y).attr("y2", y)
+		.attr("stroke", "#333");
+
+	    chart.selectAll("text")
+		.data(y.ticks(4))
+		.enter().append("svg:text")
+		.attr("class", "xlabel")
+		.attr("x", pad-4).attr("y", y)
+		.attr("text-anchor", "end")
+		.text(function(d) { return (d*100).toFixed(0) + "%"; });
+
+	    $.each(rzs, function(j, rz) {
+		var pts = runs[rz].filter(function(d) { return d[m[0]] != undefined; });
+		var line = d3.svg.line()
+		    .x(function(d) { return x(d.t); })
+		    .y(function(d) { return y(d[m[0]]); });
+		chart.append("svg:path")
+		    .attr("d", line(pts))
+		    .attr("fill", "none")
+		    .attr("stroke", color(j))
+		    .append("svg:title").text(rz);
+	    });
+	});
+
+	var legend = div.append("div").attr("class", "stbox st_trend");
+	$.each(rzs, function(j, rz) {
+	    legend.append("div").attr("class", "stdat").style("color", color(j)).text(rz + " (" + runs[rz].length + " runs)");
+	});
+    });
+}
+
 function widget_h2(node, title, id) {
     var n = node.append("div").attr("class", "stbox sttitle")
     if (id) {
@@ -266,8 +355,10 @@ function convert_label(lbl) {
 	return lbl;
 }
 
-function interval_chart(node, data, x, klass, y_off, id) {
-    //create an time interval chart from the data and add to node. id refers to interval detail elem
+function interval_chart(node, data, x, klass, y_off, id, classes) {
+    //create an time interval chart from the data and add to node. id refers to interval detail elem.
+    //time buckets of a timeline tile have the fraction of the bucket covered in `cover`, or the fraction of each
+    //frame class (named in `classes`) in `classes`, `score` being the dominant one
     node.append("svg:g")
 	.attr("class", klass)
 	.selectAll("rect")
@@ -275,25 +366,34 @@ function interval_chart(node, data, x, klass, y_off, id) {
 	.enter().append("svg:rect")
 	.attr("style", function(d) {
 	    if (klass=="segment_chart" && (d["score"] == "TP" || d["score"] == "TN") ) { return "stroke:#343738;fill: #77AB13;"};
+	    if (d["cover"] != undefined) { return "stroke:none;opacity:" + (0.2 + 0.6*d["cover"]); };
 	})
 	.attr("rx", 2).attr("ry", 2)
 	.attr("y", y_off)
 	.attr("x", function(d, i) { return x_offset + x(d["t1"]); })
 	.attr("width", function(d, i) { if((x(d["t2"]) - x(d["t1"])) < 0)console.log(d);return x(d["t2"]) - x(d["t1"]); })
 	.attr("height", bar_h)
-	.on("mouseover", function(d) { interval_detail(d, klass, id); })
+	.on("mouseover", function(d) { interval_detail(d, klass, id, classes); })
 	.on("mouseout", function(d) { d3.select("#"+id).text(""); } );
 
 }
 
-function interval_detail(d, klass, id) {
+function interval_detail(d, klass, id, classes) {
     //show detail of this interval
     var s = tms_fmt(new Date(d["t1"])) + " - " + tms_fmt(new Date(d["t2"]));
     if (klass == "truth_chart")
 	s += " (Ground truth) - " + d.label;
     else if (klass == "detected_chart")
 	s += " (Detected) - " + d.label;
-    else if (klass == "segment_chart") {
+    if (d["cover"] != undefined)
+	s += " - " + pct_str(d["cover"]) + " covered";
+    else if (d["classes"] != undefined) {
+	s += " (Segments)";
+	$.each(d["classes"], function(i, v) {
+	    if (v > 0)
+		s += " " + classes[i] + " " + pct_str(v);
+	});
+    } else if (klass == "segment_chart") {
 	s += " (Segment " + d["score"] + ") ";
 	if (d["err"])
 	    s += " " + d["err"]
@@ -447,7 +547,7 @@ function ti_chart(node, data, x, title) {
     var y_off = 0;
     var line_w = 1;
 
-    data = $.map(data.intervals, function(item, i) { return {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2) } });
+    data = $.map(data.intervals, function(item, i) { return {"t1":Date.parse(item.t1), "t2":Date.parse(item.t2), "count":item.count, "rate":item.rate, "jitter":item.jitter } });
 
     chart.append("svg:g")
 	.attr("class", "ti_chart")
@@ -459,7 +559,9 @@ function ti_chart(node, data, x, title) {
 	.attr("y", y_off)
 	.attr("x", function(d, i) { return x_offset + x(d["t1"]); })
 	.attr("width", function(d, i) { if((x(d["t2"]) - x(d["t1"])) < 0)console.log(d);return x(d["t2"]) - x(d["t1"]); })
-	.attr("height", 16);
+	.attr("height", 16)
+	.append("svg:title")
+	.text(function(d) { return "count: " + d.count + (d.rate != undefined ? " | rate: " + d.rate.toFixed(2) + "Hz | jitter: " + d.jitter.toFixed(3) + "s" : ""); });
 
     div.append("div")
 	.attr("style", "text-align:center;font-size:11px;;padding-top:6px;")
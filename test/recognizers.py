@@ -1,5 +1,5 @@
 
-import json
+import hashlib, json
 
 import sys
 sys.path.append("..")
@@ -8,7 +8,15 @@ from recog import AbstractRecognizer
 
 """ These are some dummy recognizers that are used to test the system"""
 
-class DummyWalkingDetector(AbstractRecognizer):
+EXAMPLE_RESULT = "test/example_result.json"
+
+class DummyRecognizer(AbstractRecognizer):
+    """returns results from the example output, so they are cached apart for each version of it"""
+    def cache_key(self):
+        with open(EXAMPLE_RESULT, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+class DummyWalkingDetector(DummyRecognizer):
     """always return the walking results from the example output"""
     def labels_supported(self):
         return ["WALKING"]
@@ -17,14 +25,14 @@ class DummyWalkingDetector(AbstractRecognizer):
         pass
 
     def get_results(self, errors=True):
-        with open("test/example_result.json") as f:
+        with open(EXAMPLE_RESULT) as f:
             res = json.loads(f.read())
             return [r for r in res if r["label"] == "WALKING" ]
 
     def reset(self):
         pass
 
-class DummyRunningDetector(AbstractRecognizer):
+class DummyRunningDetector(DummyRecognizer):
     """always return the running results from the example output"""
     def labels_supported(self):
         return ["RUNNING"]
@@ -33,14 +41,14 @@ class DummyRunningDetector(AbstractRecognizer):
         pass
 
     def get_results(self, errors=True):
-        with open("test/example_result.json") as f:
+        with open(EXAMPLE_RESULT) as f:
             res = json.loads(f.read())
             return [r for r in res if r["label"] == "RUNNING" ]
 
     def reset(self):
         pass
 
-class DummyStandingDetector(AbstractRecognizer):
+class DummyStandingDetector(DummyRecognizer):
     """always return the standing results from the example output"""
     def labels_supported(self):
         return ["STANDING"]
@@ -49,7 +57,7 @@ class DummyStandingDetector(AbstractRecognizer):
         pass
 
     def get_results(self, errors=True):
-        with open("test/example_result.json") as f:
+        with open(EXAMPLE_RESULT) as f:
             res = json.loads(f.read())
             return [r for r in res if r["label"] == "STANDING" ]
 
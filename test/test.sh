@@ -1,4 +1,21 @@
-./perfboard.py --recognizers=test.recognizers.DummyWalkingDetector test/example_truth.json
-./perfboard.py --recognizers=test.recognizers.DummyStandingDetector test/example_truth.json
-./perfboard.py --recognizers=test.recognizers.DummyRunningDetector test/example_truth.json
-./perfboard.py --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyRunningDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+CACHE_DIR=${TMPDIR:-/tmp}/perfboard-test-cache #not the cache of real runs
+rm -rf "$CACHE_DIR"
+./perfboard.py --cache-dir="$CACHE_DIR" --recognizers=test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --recognizers=test.recognizers.DummyStandingDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --recognizers=test.recognizers.DummyRunningDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyRunningDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --jobs=2 --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyRunningDetector,test.recognizers.DummyWalkingDetector test/example_truth.json test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --timeline=10 --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --bootstrap=2000 --bootstrap-block=60 --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py sweep --cache-dir="$CACHE_DIR" --recognizer=bench.recognizers.DensityDetector --grid='{"density": [6, 60, 600], "seed": [0, 1]}' test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --shard=1/2 --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py --cache-dir="$CACHE_DIR" --shard=2/2 --recognizers=test.recognizers.DummyStandingDetector,test.recognizers.DummyWalkingDetector test/example_truth.json
+./perfboard.py merge static/scores/partial-1-of-2.jsonl static/scores/partial-2-of-2.jsonl
+#scores of cached results follow edits of the labels: add a label over a detection, then compare with an uncached run
+RELABELED="$CACHE_DIR/relabeled.json"
+python -c 'import json, os, sys; d = json.load(open(sys.argv[1])); d["data_path"] = os.path.abspath(os.path.join(os.path.dirname(sys.argv[1]), d["data_path"])); json.dump(d, open(sys.argv[2], "w"))' test/example_truth.json "$RELABELED"
+./perfboard.py --cache-dir="$CACHE_DIR" --norotate --outpath="$CACHE_DIR/cached" --recognizers=test.recognizers.DummyRunningDetector "$RELABELED"
+python -c 'import json, sys; d = json.load(open(sys.argv[1])); d["labels"].append(dict(label="RUNNING", t1="2012-05-16T09:06:34-08:00", t2="2012-05-16T09:06:54-08:00")); json.dump(d, open(sys.argv[1], "w"))' "$RELABELED"
+./perfboard.py --cache-dir="$CACHE_DIR" --norotate --outpath="$CACHE_DIR/cached" --recognizers=test.recognizers.DummyRunningDetector "$RELABELED"
+./perfboard.py --no-cache --norotate --outpath="$CACHE_DIR/uncached" --recognizers=test.recognizers.DummyRunningDetector "$RELABELED"
+python -c 'import json, sys; a, b = [json.load(open(x + "/scores/scores.json"))["scores"]["event_scores"] for x in sys.argv[1:]]; sys.exit(a != b and "cached event scores %s != uncached %s" % (a, b))' "$CACHE_DIR/cached" "$CACHE_DIR/uncached"
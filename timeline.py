@@ -0,0 +1,106 @@
+import json, os, shutil
+
+import numpy as np
+
+import score
+from util import to_json
+
+# Level of detail timelines of long cases, for the dashboard to draw them without loading every segment.
+#
+# The span of a case is split into a tree of tiles: the root tile (level 0) covers the whole case, and each tile is
+# split into `FANOUT` tiles covering equal parts of it, down to tiles overlapping at most `TILE_SEGMENTS` segments.
+# These leaf tiles hold the segments, labels and detections overlapping them. The other tiles hold `BUCKETS` equal
+# time buckets, each with the duration weighted fractions of the frame classes of the segments in it, and of the time
+# covered by labels and by detections, with the dominant class and labels. Tile `i` of level `l` is written to
+# `<l>-<i>.json` in the tiles dir of the case, and covers the `i`th of the `FANOUT**l` equal parts of the case.
+
+BUCKETS = 256 #time buckets of a tile
+FANOUT = 4 #tiles a tile is split into
+TILE_SEGMENTS = 512 #at most, in a leaf tile
+CLASSES = score.ERRORS[1:] + score.SCORES #error class of a segment, or its score if it has none
+
+def segment_arrays(segs):
+    """return the bounds (epoch microseconds) and index in `CLASSES` of the segments of a result, either
+    `score.Segments` or their json form (e.g. of a result read back from a file)"""
+    if isinstance(segs, score.Segments):
+        times, err, scores = segs.times, segs.err, segs.score
+    else:
+        times = np.array([epoch(x["t1"]) for x in segs] + [epoch(segs[-1]["t2"])], dtype=np.int64)
+        err = np.array([score.ERRORS.index(x.get("err")) for x in segs], dtype=np.intp)
+        scores = np.array([score.SCORES.index(x["score"]) for x in segs], dtype=np.intp)
+    codes = np.where(err > 0, err - 1, len(score.ERRORS) - 1 + scores)
+    return times, codes
+
+def epoch(t):
+    return score.to_epoch(score.parse_date(t))
+
+def label_codes(segs, items, names):
+    """return the index in `names` of the label of the item overlapping each of the `segs`, 0 (None) where none does"""
+    idx = np.array(score.overlap_index(segs, items), dtype=np.intp)
+    codes = np.array([names.index(x.item["label"]) for x in items] + [0], dtype=np.intp)
+    return codes[idx]
+
+def case_tiles(res):
+    """yield the (level, index, tile) of the timeline tiles of the scored result `res`"""
+    segs = res["scores"]["segments"]
+    times, codes = segment_arrays(segs)
+    if not isinstance(segs, score.Segments):
+        segs = score.Segments([(t, None) for t in times.tolist()])
+    labels, detected = score.spans(res["labels"]), score.spans(res["detected"])
+    names = [None] + sorted(set(x.item["label"] for x in labels + detected))
+    covers = dict(segments=score.Coverage(times, codes, len(CLASSES)),
+                  labels=score.Coverage(times, label_codes(segs, labels, names), len(names)),
+                  detected=score.Coverage(times, label_codes(segs, detected, names), len(names)))
+    spans = dict((k, (np.array([x.t1 for x in v], dtype=np.int64), np.array([x.t2 for x in v], dtype=np.int64), v))
+                 for k, v in (("labels", labels), ("detected", detected)))
+    seg_json = segs if isinstance(res["scores"]["segments"], score.Segments) else None
+
+    todo = [(0, 0, int(times[0]), int(times[-1]))]
+    while todo:
+        level, index, t1, t2 = todo.pop()
+        tile = dict(level=level, index=index, t1=t1 // 1000, t2=t2 // 1000) #epoch milliseconds, as in javascript
+        lo = max(np.searchsorted(times, t1, side="right") - 1, 0)
+        hi = min(np.searchsorted(times, t2, side="left"), len(codes))
+        if hi - lo <= TILE_SEGMENTS:
+            tile["leaf"] = True
+            tile["segments"] = [seg_json[i].to_json() for i in xrange(lo, hi)] if seg_json else res["scores"]["segments"][lo:hi]
+            for k, (t1s, t2s, items) in spans.iteritems():
+                tile[k] = [items[i].item for i in np.flatnonzero((t1s <= t2) & (t2s >= t1)).tolist()]
+        else:
+            edges = t1 + np.arange(BUCKETS + 1, dtype=np.int64) * (t2 - t1) // BUCKETS
+            width = np.maximum(np.diff(edges), 1).astype(np.float64)[:, np.newaxis]
+            d = covers["segments"].durations(edges)
+            tile["classes"] = np.round(d / width, 3).tolist()
+            tile["class"] = [CLASSES[k] for k in d.argmax(axis=1).tolist()]
+            for k in ("labels", "detected"):
+                d = covers[k].durations(edges)
+                tile[k] = np.round(1 - d[:, 0] / width[:, 0], 3).tolist() #covered by any label
+                d[:, 0] = 0
+                tile[k + "_label"] = [names[j] if n else None for j, n in zip(d.argmax(axis=1).tolist(), d.max(axis=1).tolist())]
+            bounds = t1 + np.arange(FANOUT + 1, dtype=np.int64) * (t2 - t1) // FANOUT
+            for j in reversed(xrange(FANOUT)):
+                todo.append((level + 1, index * FANOUT + j, int(bounds[j]), int(bounds[j+1])))
+        yield level, index, tile
+
+def tiles_dir(detail):
+    """return the tiles dir of the case detail file `detail`"""
+    return os.path.splitext(detail)[0] + ".tiles"
+
+def write_tiles(res, outpath, detail):
+    """write the timeline tiles of scored result `res`, whose case detail file is `detail` (relative to `outpath`),
+    replacing any previous ones. return the timeline entry of its case summary"""
+    path = tiles_dir(detail)
+    fpath = os.path.join(outpath, path)
+    shutil.rmtree(fpath, ignore_errors=True)
+    os.makedirs(fpath)
+    levels = count = 0
+    for level, index, tile in case_tiles(res):
+        with open(os.path.join(fpath, "%d-%d.json" % (level, index)), "w") as f:
+            f.write(json.dumps(tile, default=to_json))
+        levels = max(levels, level + 1)
+        count += 1
+    return dict(path=path, levels=levels, tiles=count, fanout=FANOUT, buckets=BUCKETS, classes=CLASSES)
+
+def remove_tiles(outpath, detail):
+    """remove the timeline tiles of case detail file `detail`, if any"""
+    shutil.rmtree(os.path.join(outpath, tiles_dir(detail)), ignore_errors=True)
@@ -0,0 +1,187 @@
+import contextlib, cProfile, collections, resource, sys, threading, time
+
+import numpy as np
+
+import score
+
+# Stages of an evaluation, each timed per data file or recognizer:
+#
+#   read         - reading (and gunzipping) a whole raw data file
+#   decode       - json decoding of a raw data file (when streaming, includes reading)
+#   process      - a recognizer's `process()` of all the records of a case
+#   get_results  - a recognizer's `get_results()` (of each window, when scoring incrementally)
+#   score        - scoring the results of a recognizer for a case (or each window)
+#   write        - writing the scores
+#   timeline     - building and writing the timeline tiles of a long case
+
+class Stage(object):
+    """accumulated wall and cpu seconds, calls and record/item count of a stage"""
+    __slots__ = ("wall", "cpu", "calls", "count")
+
+    def __init__(self):
+        self.wall = self.cpu = 0.0
+        self.calls = self.count = 0
+
+    def add(self, other):
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.calls += other.calls
+        self.count += other.count
+
+class Timings(object):
+    """wall and cpu time and counts of the stages of a run, keyed on stage name and data file or recognizer.
+    `hooks` are called as `hook(event, stage, key)` with event "start" or "end" around every timed stage,
+    e.g. to profile some stages with `ProfileHook`. cpu time is that of the whole process, so it includes
+    other threads running concurrently.
+    """
+
+    def __init__(self, hooks=()):
+        self.stages = collections.OrderedDict() #Stage keyed on (stage, key)
+        self.hooks = list(hooks)
+
+    def get(self, name, key=None):
+        s = self.stages.get((name, key))
+        if s is None:
+            s = self.stages.setdefault((name, key), Stage())
+        return s
+
+    @contextlib.contextmanager
+    def stage(self, name, key=None):
+        """time the block as stage `name` of `key`. yields the `Stage`, to add to its `count`"""
+        s = self.get(name, key)
+        for hook in self.hooks:
+            hook("start", name, key)
+        w0, c0 = time.time(), time.clock()
+        try:
+            yield s
+        finally:
+            s.wall += time.time() - w0
+            s.cpu += time.clock() - c0
+            s.calls += 1
+            for hook in self.hooks:
+                hook("end", name, key)
+
+    def iterate(self, items, name, key=None):
+        """yield from iterable `items` (e.g. batches of records), timing the production of each item as stage `name`"""
+        it = iter(items)
+        while True:
+            with self.stage(name, key) as s:
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                s.count += len(item)
+            yield item
+
+    def merge(self, other):
+        """add the timings of `other`, e.g. from a worker process"""
+        for k, s in other.stages.iteritems():
+            self.get(*k).add(s)
+
+    @classmethod
+    def from_json(cls, d):
+        """return the `Timings` of `d` written by `to_json`, e.g. of another run to `merge`"""
+        timings = cls()
+        for x in d["stages"]:
+            s = timings.get(x["stage"], x["key"])
+            s.wall, s.cpu, s.calls, s.count = x["wall"], x["cpu"], x["calls"], x["count"]
+        return timings
+
+    def totals(self):
+        """return `Stage` totals keyed on stage name"""
+        d = collections.OrderedDict()
+        for (name, key), s in self.stages.iteritems():
+            d.setdefault(name, Stage()).add(s)
+        return d
+
+    def to_json(self):
+        stage_json = lambda s: dict(wall=s.wall, cpu=s.cpu, calls=s.calls, count=s.count)
+        stages = []
+        for (name, key), s in self.stages.iteritems():
+            d = stage_json(s)
+            d.update(stage=name, key=key)
+            stages.append(d)
+        return dict(stages=stages, totals=dict((k, stage_json(s)) for k, s in self.totals().iteritems()))
+
+    def summary(self):
+        """return list of lines of a table of the timings, with the totals of each stage"""
+        lines = ["%-12s %-48s %6s %10s %9s %9s %10s" % ("stage", "file / recognizer", "calls", "count", "wall", "cpu", "count/s")]
+        rows = []
+        for name, total in self.totals().iteritems(): #grouped by stage
+            rows += [((n, key), s) for (n, key), s in self.stages.iteritems() if n == name]
+            rows.append(((name, "(total)"), total))
+        for (name, key), s in rows:
+            key = "-" if key is None else str(key)
+            if len(key) > 48:
+                key = "..." + key[-45:]
+            rate = "%10.0f" % (s.count / s.wall) if s.count and s.wall else "%10s" % "-"
+            lines.append("%-12s %-48s %6d %10d %8.3fs %8.3fs %s" % (name, key, s.calls, s.count, s.wall, s.cpu, rate))
+        return lines
+
+    def __getstate__(self):
+        return dict(stages=self.stages, hooks=[]) #hooks stay in their process
+
+class ProfileHook(object):
+    """timing hook that runs cProfile during the stages named in `stages` (all stages if empty).
+    cProfile only profiles the thread that enables it, so stages run in other threads are skipped"""
+
+    def __init__(self, stages=()):
+        self.stages = set(stages)
+        self.profile = cProfile.Profile()
+        self.depth = 0
+        self.thread = threading.current_thread()
+
+    def __call__(self, event, stage, key):
+        if self.stages and stage not in self.stages or threading.current_thread() is not self.thread:
+            return
+        if event == "start":
+            if not self.depth:
+                self.profile.enable()
+            self.depth += 1
+        else:
+            self.depth -= 1
+            if not self.depth:
+                self.profile.disable()
+
+    def dump(self, fname):
+        """write the profile stats to `fname`, for `pstats`"""
+        self.profile.dump_stats(fname)
+
+def peak_rss():
+    """return the peak resident memory of the process so far, in bytes"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+class CostMeter(object):
+    """computational cost of a recognizer on a case: the latency of each `process()` call, the records processed,
+    the time in `get_results()`, and how much the peak resident memory of the process grew during these calls.
+    (with recognizers running in threads, the memory growth is only approximately attributed)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.records = 0
+        self.results_time = 0.0
+        self.rss_growth = 0
+
+    def process(self, rz, recs):
+        rss, t0 = peak_rss(), time.time()
+        rz.process(recs)
+        self.latencies.append(time.time() - t0)
+        self.records += len(recs)
+        self.rss_growth += peak_rss() - rss
+
+    def get_results(self, rz, *args):
+        rss, t0 = peak_rss(), time.time()
+        res = rz.get_results(*args)
+        self.results_time += time.time() - t0
+        self.rss_growth += peak_rss() - rss
+        return res
+
+    def to_json(self, span):
+        """return the cost scores, for data spanning `span` seconds"""
+        lat = np.array(self.latencies)
+        d = dict(cases=1, process_calls=len(lat), process_time=float(lat.sum()), results_time=self.results_time,
+                 records=self.records, span=span, rss_growth=self.rss_growth)
+        d["latency_hist"] = score.latency_hist(lat)
+        d["latency"] = score.latency_scores(d["latency_hist"], lat)
+        return score.cost_rates(d)
@@ -1,10 +1,29 @@
-
-import json
+import contextlib, json, os, tempfile
 
 def read_json(fname):
     with open(fname) as f:
         return json.loads(f.read())
 
-def write_json(obj, fname):
-    with open(fname, "w") as f:
-        f.write(json.dumps(obj))
+def write_json(obj, fname, atomic=False):
+    """write `obj` to `fname` as json. if `atomic`, the file is written aside and renamed into place,
+    so readers (e.g. the dashboard) never see a partial file"""
+    with (atomic_open(fname) if atomic else open(fname, "w")) as f:
+        f.write(json.dumps(obj, default=to_json))
+
+@contextlib.contextmanager
+def atomic_open(fname):
+    """open `fname` for writing aside, and rename it into place once the block is done, or remove it on error"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fname)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            yield f
+        os.rename(tmp, fname)
+    except:
+        os.remove(tmp)
+        raise
+
+def to_json(obj):
+    """json-encode objects that provide their own json form, e.g. `score.Segments`"""
+    if hasattr(obj, "to_json"):
+        return obj.to_json()
+    raise TypeError("%r is not JSON serializable" % obj)